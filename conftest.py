@@ -0,0 +1,22 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+
+# 测试共用的站点数据：bootstrap_sites 建两个站点（HomePage 为根）并各加一个频道落地页，generate_articles 每站批量生成少量文章
+
+CHANNELS=[("科技","tech"),("财经","finance"),("体育","sports")]
+
+@pytest.fixture
+def news_sites(db):
+    from wagtail.models import Site
+    from core.sites import registry
+    from news.models import Channel, ChannelsIndexPage
+    Site.objects.all().delete()
+    call_command("bootstrap_sites",verbosity=0)
+    for site in Site.objects.all():
+        page=ChannelsIndexPage(title="频道",slug="channels")
+        site.root_page.add_child(instance=page); page.save_revision().publish()
+    for name,slug in CHANNELS: Channel.objects.create(name=name,slug=slug)
+    call_command("generate_articles","--count","30","--seed","1","--image-ratio","0",stdout=StringIO())
+    registry.invalidate()
+    return list(Site.objects.order_by("id"))
@@ -0,0 +1,89 @@
+import random, threading, time
+from django.conf import settings
+from django.core.cache import caches
+from .profiling import cache_result
+
+# stale-while-revalidate 缓存：条目带“新鲜截止时间”和版本号；过期或版本不符时只有拿到锁的
+# 一个 worker 重算，其余请求直接返回旧值。配置了 REDIS_URL 时用 Redis 分布式锁，否则用进程内锁。
+# 过期时间加随机抖动，避免同批写入的键同时到期。
+
+# 进程内锁按键的哈希分条（固定数量），键空间再大（接口按游标/条数缓存）也不会无限增长；
+# 不同键偶尔落在同一条上只会让其中一个多返回一次旧值或等待 SWR_LOCK_WAIT，不会死锁
+LOCAL_LOCK_STRIPES=256
+_local_locks=[threading.Lock() for _ in range(LOCAL_LOCK_STRIPES)]
+
+def jitter(ttl):
+    j=settings.CACHE_TTL_JITTER
+    return max(1,int(ttl*random.uniform(1-j,1+j)))
+
+class _LocalLock:
+    def __init__(self,key):
+        self._lock=_local_locks[hash(key)%LOCAL_LOCK_STRIPES]
+    def acquire(self,wait=0):
+        return self._lock.acquire(True,wait) if wait else self._lock.acquire(False)
+    def release(self):
+        self._lock.release()
+
+class _RedisLock:
+    def __init__(self,cache,key):
+        self._lock=cache.lock(f"swr-lock:{key}",timeout=settings.SWR_LOCK_TIMEOUT)
+    def acquire(self,wait=0):
+        return self._lock.acquire(blocking=bool(wait),blocking_timeout=wait or None)
+    def release(self):
+        from redis.exceptions import LockError
+        try: self._lock.release()
+        except LockError: pass  # 锁已超时被释放
+
+def _lock(cache,key):
+    if settings.REDIS_URL and hasattr(cache,"lock"): return _RedisLock(cache,key)
+    return _LocalLock(key)
+
+def swr_set(key,value,ttl,version=None,alias="default"):
+    ttl=jitter(ttl)
+    caches[alias].set(key,{"v":value,"ver":version,"exp":time.time()+ttl},ttl+settings.SWR_STALE_TTL)
+    return value
+
+def swr_peek(key,version=None,alias="default"):
+    """只读取新鲜且版本一致的值，不触发重算。"""
+    entry=caches[alias].get(key)
+    if entry and entry["ver"]==version and entry["exp"]>time.time(): return entry["v"]
+    return None
+
+def swr_expire(key,alias="default"):
+    """标记为过期但保留旧值，下一个请求负责刷新，其余请求继续拿旧值。"""
+    cache=caches[alias]
+    entry=cache.get(key)
+    if entry:
+        entry["exp"]=0; cache.set(key,entry,settings.SWR_STALE_TTL)
+
+# 内容版本：某个作用域（站点、门户列表等）最近一次内容变化的时间戳，既用作缓存版本也用作 Last-Modified
+
+def content_version(scope,alias="default"):
+    cache=caches[alias]; key=f"content:ver:{scope}"
+    v=cache.get(key)
+    if v is None:
+        now=time.time(); cache.add(key,now,None); v=cache.get(key) or now
+    return v
+
+def bump_content_version(*scopes,alias="default"):
+    now=time.time()
+    caches[alias].set_many({f"content:ver:{s}":now for s in scopes},None)
+
+def swr_get(key,builder,ttl,version=None,alias="default"):
+    cache=caches[alias]
+    entry=cache.get(key)
+    if entry and entry["ver"]==version and entry["exp"]>time.time():
+        cache_result("swr","hit"); return entry["v"]
+    cache_result("swr","stale" if entry else "miss")
+    lock=_lock(cache,key)
+    if not lock.acquire():
+        if entry: return entry["v"]
+        # 冷启动没有旧值：等持锁者算完再读；等不到就自己算但不写缓存
+        if not lock.acquire(settings.SWR_LOCK_WAIT): return builder()
+        entry=cache.get(key)
+        if entry and entry["ver"]==version and entry["exp"]>time.time():
+            lock.release(); return entry["v"]
+    try:
+        return swr_set(key,builder(),ttl,version,alias)
+    finally:
+        lock.release()
@@ -0,0 +1,136 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from news.listing import listing, order_fields
+
+# 首页组装：所有模块的候选集用固定条数的查询一次取回（按频道+有无图分区的窗口排名），
+# 跨模块去重、补齐全部在内存完成；查询数与模块数量无关。候选集读列表读模型（news.ArticleListing），
+# 按 (站点, 频道, 排序字段) 的复合索引扫描，不联页面表与频道中间表。
+
+FEATURED_ORDERING="-is_featured,-feature_rank,-date"
+ROW_FIELDS=("article_id","is_featured","feature_rank","date","hero_image_id")
+
+def _order_exprs(ordering):
+    return [F(o[1:]).desc() if o.startswith("-") else F(o).asc() for o in order_fields(ordering)]
+
+def sort_rows(rows,ordering):
+    out=list(rows)
+    for o in reversed(order_fields(ordering,"id")):
+        key=o.lstrip("-"); out.sort(key=lambda r:r[key],reverse=o.startswith("-"))
+    return out
+
+def ranked_rows(qs,orderings,partition,k,fields=ROW_FIELDS):
+    """每个分区（partition + 有无图）在每种排序下只保留前 k 行；返回行字典列表（文章 ID 在 "id" 键下，同一行只出现一次）。
+    每种排序一个窗口子查询、UNION ALL 成一条语句：每个子查询的分区与排序都对应一条复合索引，不需要额外排序。"""
+    parts=[qs.annotate(rn=Window(RowNumber(),partition_by=[*partition,F("has_image")],order_by=_order_exprs(o)))
+           .filter(rn__lte=k).values(*fields) for o in orderings]
+    if not parts: return []
+    rows={}
+    for r in parts[0].union(*parts[1:],all=True) if len(parts)>1 else parts[0]:
+        r["id"]=r.pop("article_id"); rows.setdefault((r["id"],r.get("channel_id")),r)
+    return list(rows.values())
+
+def pick(rows,ordering,limit,exclude,only_img=False):
+    out=[]
+    for r in sort_rows(rows,ordering):
+        if len(out)>=limit: break
+        if r["id"] in exclude or (only_img and not r["hero_image_id"]): continue
+        out.append(r["id"])
+    return out
+
+def article_base(site):
+    """站点的列表行（channel 为空的站点行，每篇文章一行）。"""
+    return listing(site)
+
+def module_specs(page,settings):
+    specs=[]
+    for block in page.modules:
+        b=block.value
+        ch=b["channel"]
+        if ch is None: continue
+        only_img=b.get("only_with_image",settings.only_with_image_default)
+        limit=b.get("limit") or settings.default_limit
+        sig=f"ch:{getattr(ch,'slug','na')}|ord:{b.get('ordering')}|lim:{limit}|img:{only_img}|xch:{settings.module_backfill_cross_channel}"
+        specs.append({"title":b.get("title") or ch.name,"channel":ch,"ordering":b["ordering"],"limit":limit,"only_img":only_img,"sig":sig})
+    return specs
+
+def candidate_k(specs,selected_ids):
+    # 每个分区最多被前面已选的条目挤掉 k-limit 条，取前 k 即可保证结果正确
+    return len(selected_ids)+sum(s["limit"] for s in specs)
+
+def channel_rows(site,specs,k,ch_ids):
+    from news.models import ArticleListing
+    by_ch=defaultdict(list)
+    if not ch_ids: return by_ch
+    orderings=sorted({s["ordering"] for s in specs})
+    qs=ArticleListing.objects.filter(site_id=site.id,channel_id__in=ch_ids)
+    for r in ranked_rows(qs,orderings,[F("channel_id")],k,ROW_FIELDS+("channel_id",)):
+        by_ch[r["channel_id"]].append(r)
+    return by_ch
+
+def featured_ids(page,site,settings,base):
+    from news.models import ArticlePage
+    # 手动精选：一次取回并校验站点归属（保持原逻辑：不要求 live）
+    manual_ids=[fi.article_id for fi in page.featured_items.all()]
+    if manual_ids:
+        valid=set(ArticlePage.objects.descendant_of(site.root_page).filter(id__in=manual_ids).values_list("id",flat=True))
+        manual_ids=[i for i in dict.fromkeys(manual_ids) if i in valid]
+    target=max(0,settings.featured_target-len(manual_ids))
+    if target and settings.featured_use_hot:
+        manual_ids+=hot_featured_ids(site,settings,base,target,set(manual_ids))
+        target=max(0,settings.featured_target-len(manual_ids))
+    if target:
+        qs=base
+        if settings.only_with_image_default: qs=qs.filter(has_image=True)
+        if settings.hot_time_window_hours>0: qs=qs.filter(date__gte=timezone.now()-timedelta(hours=settings.hot_time_window_hours))
+        qs=qs.exclude(article_id__in=manual_ids).order_by(*order_fields(FEATURED_ORDERING))[:target]
+        manual_ids+=list(qs.values_list("article_id",flat=True))
+    return manual_ids
+
+def hot_featured_ids(site,settings,base,limit,exclude):
+    """按热度排行补齐精选：排行里已带有无图与发布时间，先在内存过滤，再用一次查询剔除排行重算后撤回的文章。"""
+    from news.hot import hot_items, ranking_scope
+    since=(timezone.now()-timedelta(hours=settings.hot_time_window_hours)).timestamp() if settings.hot_time_window_hours>0 else None
+    ids=[i for i,has_img,ts in hot_items(ranking_scope(site.id))
+         if i not in exclude and (has_img or not settings.only_with_image_default) and not (since and ts<since)]
+    if not ids: return []
+    live=set(base.filter(article_id__in=ids).values_list("article_id",flat=True))
+    return [i for i in ids if i in live][:limit]
+
+def module_ids(spec,by_ch,site_rows,selected_ids):
+    items=pick(by_ch.get(spec["channel"].id,[]),spec["ordering"],spec["limit"],selected_ids,spec["only_img"])
+    need=spec["limit"]-len(items)
+    if need>0 and site_rows:
+        items+=pick(site_rows,spec["ordering"],need,selected_ids|set(items),spec["only_img"])
+    return items
+
+def assemble_ids(page,site,settings):
+    """只计算 ID：返回 (specs, featured_ids, [每个模块的 ID 列表])。"""
+    base=article_base(site)
+    specs=module_specs(page,settings)
+    fids=featured_ids(page,site,settings,base)
+    selected_ids=set(fids)
+    mids=[]
+    if specs:
+        k=candidate_k(specs,selected_ids)
+        by_ch=channel_rows(site,specs,k,{s["channel"].id for s in specs})
+        site_rows=ranked_rows(base,sorted({s["ordering"] for s in specs}),[],k) if settings.module_backfill_cross_channel else []
+        for s in specs:
+            items=module_ids(s,by_ch,site_rows,selected_ids)
+            selected_ids|=set(items); mids.append(items)
+    return specs,fids,mids
+
+def hydrate(fids,mids):
+    """一次性实例化所有条目。"""
+    from news.models import ArticlePage, CARD_RENDITION, FEATURED_RENDITION
+    ids=set(fids).union(*mids)
+    found={a.id:a for a in ArticlePage.objects.filter(id__in=ids).for_cards(FEATURED_RENDITION,CARD_RENDITION)} if ids else {}
+    return [found[i] for i in fids if i in found],[[found[i] for i in m if i in found] for m in mids]
+
+def assemble_home(page,site,settings):
+    """返回 (featured, modules)，结构与模板/接口此前使用的一致。"""
+    specs,fids,mids=assemble_ids(page,site,settings)
+    featured,items=hydrate(fids,mids)
+    return featured,[{"title":s["title"],"items":m,"sig":s["sig"],"channel_slug":getattr(s["channel"],"slug",None)} for s,m in zip(specs,items)]
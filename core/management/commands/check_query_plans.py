@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from core.queryplans import PlanChecker
+from core.sites import registry
+
+# 每个 URL 都在一块全新的进程内缓存上请求（不读写共享缓存），首页快照、接口缓存、整页缓存都是冷的，
+# 检查到的就是未命中时真正执行的查询。门户接口关闭 OpenSearch，走数据库回退路径。
+
+class Command(BaseCommand):
+    help="EXPLAIN every query behind the home page, channel pages and api/portal; fail on full table scans or top-N sorts"
+
+    def add_arguments(self,parser):
+        parser.add_argument("--site",help="Hostname to request (default: the default site)")
+        parser.add_argument("--url",action="append",help="Check these paths instead of the defaults (repeatable)")
+        parser.add_argument("--min-rows",type=int,default=1000,help="Tables smaller than this may be scanned (default: 1000)")
+        parser.add_argument("--plans",action="store_true",help="Print every query plan, not only the problems")
+
+    def handle(self,*args,**options):
+        from core.prerender import channel_paths
+        from news.models import Channel
+        site=registry.for_hostname(options["site"]) if options["site"] else registry.default()
+        if site is None: raise CommandError(f"Unknown site: {options['site'] or '(no default site)'}")
+        slug=Channel.objects.filter(is_active=True).values_list("slug",flat=True).first()
+        urls=options["url"] or ["/",*channel_paths(site)[:1],"/api/portal","/api/portal?only_image=1",
+                                *([f"/api/portal?channel={slug}",f"/api/portal?channel={slug}&only_image=1"] if slug else [])]
+        client=Client(HTTP_HOST=f"{site.hostname}:{site.port}")
+        checker=PlanChecker(min_rows=options["min_rows"])
+        failed=0
+        for n,url in enumerate(urls):
+            cold={"default":{"BACKEND":"django.core.cache.backends.locmem.LocMemCache","LOCATION":f"query-plans-{n}"}}
+            with override_settings(CACHES=cold,OS_ENABLED=False,PRERENDER_ENABLED=False,PROFILING_ENABLED=False):
+                status=[]
+                results=checker.check(lambda:status.append(client.get(url).status_code))
+            if status[0]!=200: raise CommandError(f"{url}: HTTP {status[0]}")
+            bad=[r for r in results if r[2]]
+            self.stdout.write(f"{url}: {len(results)} queries, {len(bad)} with problems")
+            for sql,plan,problems in results:
+                if not (problems or options["plans"]): continue
+                self.stdout.write(f"  {sql[:200]}{'...' if len(sql)>200 else ''}")
+                for line in plan: self.stdout.write(f"    | {line}")
+                for p in problems: self.stdout.write(self.style.ERROR(f"    ! {p}"))
+            failed+=len(bad)
+        if failed: raise CommandError(f"{failed} queries fall back to full scans or sorts")
+        self.stdout.write(self.style.SUCCESS(f"{len(urls)} URLs checked: all queries use indexes"))
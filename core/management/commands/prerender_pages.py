@@ -0,0 +1,38 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.prerender import page_path, read_stamp, remove_path, run, site_targets, write_stamp
+from core.sites import registry
+
+class Command(BaseCommand):
+    help="Pre-render home, channel landing and article pages to PRERENDER_ROOT/<hostname>/ for nginx to serve directly"
+
+    def add_arguments(self,parser):
+        parser.add_argument("--site",help="Only this hostname (default: all sites)")
+        parser.add_argument("--full",action="store_true",help="Re-render every article instead of those published since the last run")
+        parser.add_argument("--processes",type=int,default=settings.PRERENDER_PROCESSES,
+                            help=f"Render worker processes (default: {settings.PRERENDER_PROCESSES})")
+
+    def handle(self,*args,**options):
+        from news.indexing import tombstone_ids
+        from news.models import ArticlePage
+        sites=registry.sites()
+        if options["site"]:
+            sites=[s for s in sites if s.hostname==options["site"]]
+            if not sites: raise CommandError(f"Unknown site: {options['site']}")
+        for site in dict((s.hostname,s) for s in sites).values():
+            started=timezone.now(); start=time.monotonic()
+            since=None if options["full"] else read_stamp(site)
+            if since:
+                # 自上次以来被撤回的文章：删掉静态文件（已删除的页面由发布钩子处理）
+                gone=ArticlePage.objects.descendant_of(site.root_page).filter(id__in=tombstone_ids(since)).only("url_path")
+                removed=sum(remove_path(site,page_path(site,p)) for p in gone)
+                if removed: self.stdout.write(f"  {site.hostname}: removed {removed} unpublished pages")
+            jobs=[(site.id,p) for p in site_targets(site,since)]
+            counts=run(jobs,options["processes"])
+            write_stamp(site,started)
+            elapsed=max(time.monotonic()-start,1e-6)
+            mode=f"since {since:%Y-%m-%d %H:%M:%S}" if since else "full"
+            self.stdout.write(self.style.SUCCESS(f"{site.hostname} ({mode}): {len(jobs)} pages in {elapsed:.1f}s "
+                                                 f"({len(jobs)/elapsed:.0f} pages/s) {counts}"))
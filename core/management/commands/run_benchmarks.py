@@ -0,0 +1,128 @@
+import json, platform, statistics, subprocess, time, tracemalloc
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from core.prerender import channel_paths, page_path
+from core.sites import registry
+
+# 基准测试：对一个站点的首页、频道落地页、文章页、api_home、api_portal 分别测量
+#   cold —— 清空默认缓存后的第一次请求（快照/接口缓存重建的代价）；
+#   warm —— 连续 N 次请求的延迟分位数；
+# 以及每次请求的查询数与 Python 内存峰值（tracemalloc，单独一次请求测量，避免拖慢计时）。
+# 整页缓存与剖析中间件在测量期间关闭，测的是回源代价。结果写成 JSON（含提交号与数据规模），--compare 对比两份报告。
+
+def git_revision():
+    try:
+        rev=subprocess.run(["git","rev-parse","--short","HEAD"],capture_output=True,text=True,check=True).stdout.strip()
+        dirty=subprocess.run(["git","status","--porcelain","--untracked-files=no"],capture_output=True,text=True).stdout.strip()
+        return rev+("-dirty" if dirty else "")
+    except (OSError,subprocess.CalledProcessError):
+        return None
+
+def percentile(values,p):
+    values=sorted(values)
+    return values[min(len(values)-1,int(round(p/100*(len(values)-1))))]
+
+class Command(BaseCommand):
+    help="Benchmark homepage, channel, article, api_home and api_portal (latency, queries, memory) and write a JSON report"
+
+    def add_arguments(self,parser):
+        parser.add_argument("--site",help="Hostname to benchmark (default: the default site)")
+        parser.add_argument("--iterations",type=int,default=30,help="Warm requests per scenario (default: 30)")
+        parser.add_argument("--only",help="Comma-separated scenario names")
+        parser.add_argument("--no-cold",action="store_true",help="Skip cold runs (they clear the default cache)")
+        parser.add_argument("--output",help="Write the JSON report here (default: print it)")
+        parser.add_argument("--compare",help="Baseline JSON report to compare against")
+
+    def scenarios(self,site):
+        from news.models import ArticlePage, Channel
+        out={"home":"/"}
+        ch=Channel.objects.filter(is_active=True,articles__in=ArticlePage.objects.listed(site)).order_by("id").first()
+        paths=channel_paths(site,[ch.slug]) if ch else []
+        if paths: out["channel"]=paths[0]
+        article=ArticlePage.objects.listed(site).order_by("-date","-id").only("url_path").first()
+        if article: out["article"]=page_path(site,article)
+        out["api_home"]=f"/api/home?site={site.hostname}"
+        out["api_portal"]="/api/portal?limit=20"
+        if ch: out["api_portal_channel"]=f"/api/portal?limit=20&channel={ch.slug}"
+        return out
+
+    def measure(self,client,path):
+        start=time.perf_counter()
+        with CaptureQueriesContext(connection) as q:
+            response=client.get(path)
+            if hasattr(response,"render") and not response.is_rendered: response.render()
+        ms=(time.perf_counter()-start)*1000
+        if response.status_code!=200: raise CommandError(f"{path}: HTTP {response.status_code}")
+        return ms,len(q),len(response.content)
+
+    def peak_memory(self,client,path):
+        tracemalloc.start()
+        try:
+            client.get(path); return tracemalloc.get_traced_memory()[1]//1024
+        finally:
+            tracemalloc.stop()
+
+    def run_scenario(self,client,path,options):
+        result={"path":path}
+        if not options["no_cold"]:
+            cache.clear(); registry.invalidate()
+            ms,queries,size=self.measure(client,path)
+            result["cold"]={"ms":round(ms,2),"queries":queries}
+        self.measure(client,path)  # 预热
+        timings=[]
+        for _ in range(options["iterations"]):
+            ms,queries,size=self.measure(client,path); timings.append(ms)
+        result["warm"]={"p50_ms":round(percentile(timings,50),2),"p95_ms":round(percentile(timings,95),2),
+                        "mean_ms":round(statistics.fmean(timings),2),"min_ms":round(min(timings),2),
+                        "queries":queries,"bytes":size,"peak_kb":self.peak_memory(client,path)}
+        return result
+
+    def handle(self,*args,**options):
+        from news.models import ArticlePage
+        import django, wagtail
+        site=registry.for_hostname(options["site"]) if options["site"] else registry.default()
+        if site is None: raise CommandError(f"Unknown site: {options['site']}")
+        if options["iterations"]<1: raise CommandError("--iterations must be at least 1")
+        host=f"{site.hostname}:{site.port}" if site.port not in (80,443) else site.hostname
+        client=Client(HTTP_HOST=host)
+        scenarios=self.scenarios(site)
+        if options["only"]:
+            wanted=options["only"].split(",")
+            scenarios={k:v for k,v in scenarios.items() if k in wanted}
+        report={"meta":{"revision":git_revision(),"created":timezone.now().isoformat(),"site":site.hostname,
+                        "python":platform.python_version(),"django":django.get_version(),"wagtail":wagtail.__version__,
+                        "database":connection.vendor,"cache":settings.CACHES["default"]["BACKEND"],
+                        "articles":ArticlePage.objects.live().count(),"site_articles":ArticlePage.objects.listed(site).count(),
+                        "iterations":options["iterations"]},"results":{}}
+        with override_settings(PAGE_CACHE_ENABLED=False,PROFILING_ENABLED=False,TRACKING_ENABLED=False):
+            for name,path in scenarios.items():
+                r=report["results"][name]=self.run_scenario(client,path,options)
+                cold=f"cold {r['cold']['ms']:.1f}ms/{r['cold']['queries']}q, " if "cold" in r else ""
+                w=r["warm"]
+                self.stderr.write(f"{name:20} {cold}warm p50 {w['p50_ms']:.1f}ms p95 {w['p95_ms']:.1f}ms "
+                                  f"{w['queries']}q {w['peak_kb']}KB")
+        data=json.dumps(report,ensure_ascii=False,indent=2)
+        if options["output"]:
+            with open(options["output"],"w",encoding="utf-8") as f: f.write(data+"\n")
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(data)
+        if options["compare"]: self.compare(options["compare"],report)
+
+    def compare(self,path,report):
+        with open(path,encoding="utf-8") as f: base=json.load(f)
+        self.stderr.write(f"\nvs {base['meta'].get('revision')} ({base['meta'].get('site_articles')} articles) -> "
+                          f"{report['meta']['revision']} ({report['meta']['site_articles']} articles)")
+        for name,r in report["results"].items():
+            old=base["results"].get(name)
+            if not old: continue
+            for phase,metric in (("cold","ms"),("cold","queries"),("warm","p50_ms"),("warm","p95_ms"),("warm","queries"),("warm","peak_kb")):
+                a=old.get(phase,{}).get(metric); b=r.get(phase,{}).get(metric)
+                if a is None or b is None: continue
+                delta=f"{(b-a)/a*100:+.0f}%" if a else "n/a"
+                self.stderr.write(f"  {name:20} {phase}.{metric:8} {a:>10} -> {b:<10} {delta}")
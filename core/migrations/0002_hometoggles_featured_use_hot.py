@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hometoggles',
+            name='featured_use_hot',
+            field=models.BooleanField(default=False, help_text='精选不足时按热度排行补齐（需定期运行 refresh_hot_rankings）'),
+        ),
+    ]
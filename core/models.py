@@ -6,6 +6,7 @@ from wagtail.snippets.blocks import SnippetChooserBlock
 from wagtail.admin.panels import FieldPanel, InlinePanel, PageChooserPanel
 from wagtail.contrib.settings.models import BaseSiteSetting, register_setting
 from modelcluster.fields import ParentalKey
+from .profiling import timing
 
 ORDER_CHOICES=[("-is_featured,-feature_rank,-date","置顶优先/最新"),("-date","最新")]
 
@@ -30,6 +31,7 @@ class HomeToggles(BaseSiteSetting):
     hot_time_window_hours=models.IntegerField(default=72)
     featured_target=models.IntegerField(default=4,help_text="首页精选目标条数，不足时自动补齐")
     module_backfill_cross_channel=models.BooleanField(default=False,help_text="模块不足位是否允许跨频道补齐")
+    featured_use_hot=models.BooleanField(default=False,help_text="精选不足时按热度排行补齐（需定期运行 refresh_hot_rankings）")
 
 class HomePage(Page):
     modules=StreamField([("channel",ChannelModuleBlock())],use_json_field=True,blank=True)
@@ -39,52 +41,22 @@ class HomePage(Page):
     subpage_types=["news.SectionIndexPage"]
 
     def get_context(self,request):
-        from news.models import ArticlePage
-        from django.utils import timezone
-        from datetime import timedelta
+        from .home import assemble_home
+        from .sites import registry
+        from .snapshot import get_home_snapshot, home_from_snapshot
         ctx=super().get_context(request)
         
-        # 获取站点
-        site = Site.find_for_request(request) or Site.objects.filter(is_default_site=True).first()
+        # 获取站点（注册表命中，无查询）
+        site = Site.find_for_request(request) or registry.default()
         if not site:
             ctx["featured"] = []
             ctx["modules"] = []
             return ctx
             
-        site_root=site.root_page
-        selected_ids=set()
-        settings=HomeToggles.for_site(site)
-        manual=[fi.article.specific for fi in self.featured_items.select_related("article")]
-        manual=[a for a in manual if a.is_descendant_of(site_root)]
-        selected_ids|={a.id for a in manual}
-        target=max(0,settings.featured_target-len(manual))
-        if target:
-            qs=ArticlePage.objects.live().public().specific().descendant_of(site_root)
-            if settings.only_with_image_default: qs=qs.filter(hero_image__isnull=False)
-            if settings.hot_time_window_hours>0: qs=qs.filter(date__gte=timezone.now()-timedelta(hours=settings.hot_time_window_hours))
-            qs=qs.exclude(id__in=selected_ids).order_by("-is_featured","-feature_rank","-date")[:target]
-            backfill=list(qs); manual.extend(backfill); selected_ids|={a.id for a in backfill}
-        ctx["featured"]=manual
-        modules_out=[]
-        for block in self.modules:
-            b=block.value
-            ch=b["channel"]
-            qs=ArticlePage.objects.live().public().specific().descendant_of(site_root).filter(channels=ch)
-            only_img=b.get("only_with_image",settings.only_with_image_default)
-            if only_img: qs=qs.filter(hero_image__isnull=False)
-            order_by=[o for o in b["ordering"].split(",") if o]
-            limit=b.get("limit") or settings.default_limit
-            qs=qs.exclude(id__in=selected_ids).order_by(*order_by).select_related("hero_image")[:limit]
-            items=list(qs)
-            need=limit-len(items)
-            if need>0:
-                backfill_qs=ArticlePage.objects.live().public().specific().descendant_of(site_root)
-                if not settings.module_backfill_cross_channel: backfill_qs=backfill_qs.filter(channels=ch)
-                if only_img: backfill_qs=backfill_qs.filter(hero_image__isnull=False)
-                backfill_qs=backfill_qs.exclude(id__in=selected_ids|{p.id for p in items}).order_by(*order_by)[:need]
-                items.extend(list(backfill_qs))
-            selected_ids|={p.id for p in items}
-            sig=f"ch:{getattr(ch,'slug','na')}|ord:{b.get('ordering')}|lim:{limit}|img:{only_img}|xch:{settings.module_backfill_cross_channel}"
-            modules_out.append({"title": b.get("title") or ch.name,"items":items,"sig":sig,"channel_slug":getattr(ch,"slug",None)})
-        ctx["modules"]=modules_out
+        settings=registry.toggles(site)
+        with timing("home"):
+            if getattr(request,"is_preview",False):
+                ctx["featured"],ctx["modules"]=assemble_home(self,site,settings)
+            else:
+                ctx["featured"],ctx["modules"]=home_from_snapshot(get_home_snapshot(self,site,settings))
         return ctx
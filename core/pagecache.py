@@ -0,0 +1,81 @@
+import hashlib, time
+from urllib.parse import parse_qsl, urlencode
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from .profiling import cache_result, set_route
+
+# 匿名读者的整页缓存：放在中间件链最前面，命中时不经过 session/CSRF/认证和 Wagtail 路由。
+# 键 = 主机 + 路径 + 归一化的查询参数（忽略 utm_* 等追踪参数）；条目带渲染开始时间与标签（page:ID / channel:slug / site:ID）。
+# 清除按标签进行：记录标签的清除时间，命中时读取条目标签的清除时间，任一晚于条目渲染开始即视为失效。
+# 只缓存主动打了标签的响应（Wagtail 页面、频道列表），且响应不能写 Cookie。
+# 渲染时记下的打点事件（文章浏览）随条目保存，命中时回放，缓存不影响计数。
+
+TAG_PREFIX="pagecache:tag:"
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+def add_cache_tags(request,*tags):
+    """标记本次响应可进入整页缓存，并附加清除标签。"""
+    if not hasattr(request,"_page_cache_tags"): request._page_cache_tags=set()
+    request._page_cache_tags.update(tags)
+
+def skip_page_cache(request):
+    """本次响应不完整（如渲染尚未生成），不写入整页缓存。"""
+    if request is not None: request._page_cache_skip=True
+
+def purge_tags(*tags):
+    if tags:
+        _cache().set_many({TAG_PREFIX+t:time.time() for t in tags},settings.PAGE_CACHE_TTL+60)
+
+def cache_key(request):
+    ignored=settings.PAGE_CACHE_IGNORED_PARAMS
+    query=sorted((k,v) for k,v in parse_qsl(request.META.get("QUERY_STRING",""),keep_blank_values=True)
+                 if k not in ignored and not k.startswith("utm_"))
+    raw=f"{request.get_host()}|{request.path}|{urlencode(query)}"
+    return "pagecache:"+hashlib.md5(raw.encode()).hexdigest()
+
+def cacheable_request(request):
+    if request.method not in ("GET","HEAD"): return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or "HTTP_AUTHORIZATION" in request.META: return False
+    return not request.path.startswith(settings.PAGE_CACHE_EXCLUDE)
+
+def cacheable_response(request,response):
+    if response.status_code!=200 or response.streaming or response.cookies: return False
+    if getattr(request,"_page_cache_skip",False) or not getattr(request,"_page_cache_tags",None): return False
+    if "private" in response.get("Cache-Control","") or "no-store" in response.get("Cache-Control",""): return False
+    user=getattr(request,"user",None)
+    return not (user and user.is_authenticated)
+
+class PageCacheMiddleware:
+    def __init__(self,get_response):
+        self.get_response=get_response
+
+    def __call__(self,request):
+        if not settings.PAGE_CACHE_ENABLED or not cacheable_request(request):
+            return self.get_response(request)
+        cache=_cache(); key=cache_key(request)
+        entry=cache.get(key)
+        if entry:
+            purged=cache.get_many([TAG_PREFIX+t for t in entry["tags"]])
+            if all(ts<=entry["born"] for ts in purged.values()):
+                response=HttpResponse(entry["content"],status=entry["status"])
+                for name,value in entry["headers"]: response[name]=value
+                if entry.get("track"):
+                    from news.tracking import track_many
+                    track_many(entry["track"],entry.get("site"))
+                response["X-Page-Cache"]="HIT"
+                cache_result("page","hit"); set_route("page-cache")
+                return response
+        cache_result("page","stale" if entry else "miss")
+        born=time.time()
+        response=self.get_response(request)
+        if cacheable_response(request,response):
+            headers=[(k,v) for k,v in response.items() if k.lower() not in ("set-cookie","x-page-cache")]
+            site=getattr(request,"_wagtail_site",None)
+            cache.set(key,{"status":response.status_code,"headers":headers,"content":response.content,
+                           "tags":sorted(request._page_cache_tags),"born":born,
+                           "track":getattr(request,"_page_cache_track",None),"site":site.id if site else None},settings.PAGE_CACHE_TTL)
+            response["X-Page-Cache"]="MISS"
+        return response
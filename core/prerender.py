@@ -0,0 +1,123 @@
+import os, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import django
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, connections
+from django.http import Http404
+from django.test import RequestFactory
+from django.utils.encoding import uri_to_iri
+
+# 静态预渲染：把首页、文章页、频道落地页按匿名访问渲染成 HTML，写到 PRERENDER_ROOT/<hostname>/<路径>/index.html，
+# nginx 先 try_files 命中静态文件，未命中再回源 Django。预渲染的只是不带查询串的页面（频道翻页 ?after=/?before= 等
+# 各种查询串变体都由 Django 处理），带查询串的请求必须绕过静态文件：
+#     root /srv/prerendered/$host;
+#     location / {
+#         error_page 418 = @django;
+#         if ($args) { return 418; }
+#         try_files $uri/index.html @django;
+#     }
+# 写入用同目录临时文件 + os.replace，读者不会看到半截文件；渲染在进程池中进行。
+# 增量预渲染的时间戳放在 PRERENDER_ROOT/.prerender-stamps/<hostname>，不在任何站点的对外根目录下。
+
+STAMP_DIR=".prerender-stamps"
+
+def site_dir(site):
+    return Path(settings.PRERENDER_ROOT)/site.hostname
+
+def stamp_path(site):
+    return Path(settings.PRERENDER_ROOT)/STAMP_DIR/site.hostname
+
+def output_path(site,path):
+    """path 为站内相对 URL（可含百分号编码），落盘时按 nginx 解码后的 $uri 存放。"""
+    parts=[p for p in uri_to_iri(path).split("/") if p and p not in (".","..")]
+    return site_dir(site).joinpath(*parts,"index.html")
+
+def write_atomic(target,content):
+    target.parent.mkdir(parents=True,exist_ok=True)
+    fd,tmp=tempfile.mkstemp(dir=target.parent,prefix=".tmp-")
+    try:
+        with os.fdopen(fd,"wb") as f: f.write(content)
+        os.chmod(tmp,0o644)
+        os.replace(tmp,target)
+    except BaseException:
+        os.unlink(tmp); raise
+
+def remove_path(site,path):
+    try:
+        output_path(site,path).unlink(); return True
+    except FileNotFoundError:
+        return False
+
+def page_path(site,page):
+    """页面在站点内的相对 URL（与 Page.relative_url 相同，但不查站点）。"""
+    return "/"+page.url_path[len(site.root_page.url_path):]
+
+def render_path(site_id,path):
+    """以匿名 GET 渲染一个路径并写盘；非 200 时删除旧文件。返回 (状态, path)。"""
+    from wagtail.views import serve
+    from .models import HomeToggles
+    from .sites import registry
+    site=registry.get(site_id)
+    if site is None: return "missing",path
+    request=RequestFactory().get(path,HTTP_HOST=f"{site.hostname}:{site.port}" if site.port not in (80,443) else site.hostname)
+    request.user=AnonymousUser(); request._wagtail_site=site; request.prerendered=True
+    setattr(request,HomeToggles.get_cache_attr_name(),registry.toggles(site))
+    try:
+        response=serve(request,uri_to_iri(path).lstrip("/"))
+        if hasattr(response,"render"): response.render()
+    except Http404:
+        response=None
+    if response is None or response.status_code!=200:
+        remove_path(site,path); return "removed",path
+    # 渲染不完整（图片渲染尚未生成）时保留旧文件，等下一次发布或全量预渲染
+    if getattr(request,"_page_cache_skip",False): return "incomplete",path
+    write_atomic(output_path(site,path),response.content)
+    return "written",path
+
+def channel_paths(site,slugs=None):
+    from news.models import Channel, ChannelsIndexPage
+    indexes=ChannelsIndexPage.objects.live().descendant_of(site.root_page).only("url_path")
+    if slugs is None: slugs=list(Channel.objects.filter(is_active=True).values_list("slug",flat=True))
+    return [page_path(site,p)+f"{slug}/" for p in indexes for slug in slugs]
+
+def article_paths(site,since=None):
+    from news.models import ArticlePage
+    qs=ArticlePage.objects.listed(site)
+    if since: qs=qs.filter(last_published_at__gte=since)
+    return [page_path(site,p) for p in qs.only("url_path").iterator()]
+
+def site_targets(site,since=None):
+    """首页 + 频道落地页每次都重渲染（代价与文章数无关），文章页按 since 增量。"""
+    return ["/",*channel_paths(site),*article_paths(site,since)]
+
+def article_targets(site,article):
+    """文章变化影响的路径：文章本身、站点首页与文章所属频道的落地页。"""
+    slugs=[c.slug for c in article.channels.all()]
+    return [page_path(site,article),"/",*channel_paths(site,slugs)]
+
+def read_stamp(site):
+    from django.utils.dateparse import parse_datetime
+    try:
+        return parse_datetime(stamp_path(site).read_text().strip())
+    except FileNotFoundError:
+        return None
+
+def write_stamp(site,when):
+    write_atomic(stamp_path(site),when.isoformat().encode())
+
+def run(jobs,processes=None,on_result=None):
+    """jobs: [(site_id, path), ...]，在进程池中渲染；返回 {状态: 数量}。"""
+    processes=settings.PRERENDER_PROCESSES if processes is None else processes
+    counts={}
+    def collect(result):
+        counts[result[0]]=counts.get(result[0],0)+1
+        if on_result: on_result(*result)
+    if processes<=1 or len(jobs)<2 or connection.in_atomic_block:
+        for job in jobs: collect(render_path(*job))
+        return counts
+    connections.close_all()  # 子进程各自建立数据库连接
+    with ProcessPoolExecutor(max_workers=min(processes,len(jobs)),initializer=django.setup) as pool:
+        for result in pool.map(render_path,*zip(*jobs),chunksize=max(1,len(jobs)//(processes*8))): collect(result)
+    return counts
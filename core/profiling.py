@@ -0,0 +1,230 @@
+import bisect, logging, threading, time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+# 请求级性能剖析（PROFILING_ENABLED=1 时启用）：每个请求统计查询数、数据库耗时、缓存命中/未命中、外部 HTTP 耗时，
+# 以及用 timing("名称") 标注的代码段（首页组装、序列化、模板渲染……），输出 Server-Timing 响应头，
+# 并累加到进程内指标，由 /metrics 以 Prometheus 文本格式导出（每个 worker 各自一份，由抓取端按实例汇总）。
+# 路由名取 URL 名称（api-home、more-items…），Wagtail 页面为 page:<页面类型>；QUERY_BUDGETS 按路由限制查询数，
+# 超出时记录日志，QUERY_BUDGET_MODE=raise 时抛出 QueryBudgetExceeded（测试客户端里直接失败）。
+
+logger=logging.getLogger(__name__)
+_current=ContextVar("request_profile",default=None)
+
+DURATION_BUCKETS=(0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5)
+QUERY_BUCKETS=(0,1,2,5,10,20,50,100)
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class Profile:
+    def __init__(self):
+        self.start=time.perf_counter()
+        self.route=None; self.view_start=self.start; self.queries=0; self.db=0.0
+        self.cache={}; self.external={}; self.spans={}
+
+    def add_span(self,name,seconds):
+        self.spans[name]=self.spans.get(name,0.0)+seconds
+
+def current():
+    return _current.get()
+
+@contextmanager
+def timing(name):
+    """标注一段代码的耗时（计入当前请求的 Server-Timing）；未启用剖析时几乎无开销。"""
+    profile=_current.get()
+    if profile is None:
+        yield; return
+    start=time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name,time.perf_counter()-start)
+
+def timed(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args,**kwargs):
+            with timing(name): return func(*args,**kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def external(service):
+    """外部 HTTP 调用（OpenSearch 等）的耗时，按服务累计。"""
+    profile=_current.get()
+    start=time.perf_counter()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.external[service]=profile.external.get(service,0.0)+time.perf_counter()-start
+
+def cache_result(cache,result):
+    """记录一次缓存读取结果（cache: swr / page；result: hit / stale / miss）。"""
+    if not settings.PROFILING_ENABLED: return
+    metrics.incr("cache",(cache,result))
+    profile=_current.get()
+    if profile is not None: profile.cache[(cache,result)]=profile.cache.get((cache,result),0)+1
+
+def set_route(route):
+    profile=_current.get()
+    if profile is not None: profile.route=route
+
+# ---- 进程内指标 ----
+
+class Histogram:
+    def __init__(self,buckets):
+        self.bounds=buckets; self.counts=[0]*(len(buckets)+1); self.sum=0.0; self.count=0
+    def observe(self,value):
+        self.counts[bisect.bisect_left(self.bounds,value)]+=1; self.sum+=value; self.count+=1
+
+class Metrics:
+    def __init__(self):
+        self._lock=threading.Lock()
+        self.requests={}; self.durations={}; self.queries={}; self.db={}; self.external={}; self.cache={}; self.budget={}
+
+    def incr(self,name,key,n=1):
+        with self._lock:
+            d=getattr(self,name); d[key]=d.get(key,0)+n
+
+    def observe(self,profile,status,elapsed):
+        route=profile.route or "unmatched"
+        with self._lock:
+            key=(route,f"{status//100}xx"); self.requests[key]=self.requests.get(key,0)+1
+            self.durations.setdefault(route,Histogram(DURATION_BUCKETS)).observe(elapsed)
+            self.queries.setdefault(route,Histogram(QUERY_BUCKETS)).observe(profile.queries)
+            self.db[route]=self.db.get(route,0.0)+profile.db
+            for service,seconds in profile.external.items():
+                self.external[(route,service)]=self.external.get((route,service),0.0)+seconds
+
+    def render(self):
+        lines=[]
+        def family(name,kind,help_text):
+            lines.append(f"# HELP {name} {help_text}"); lines.append(f"# TYPE {name} {kind}")
+        def labels(**kw):
+            return "{"+",".join(f'{k}="{str(v).replace(chr(34),"")}"' for k,v in kw.items())+"}"
+        def histogram(name,data):
+            for route,h in sorted(data.items()):
+                total=0
+                for bound,n in zip([*h.bounds,"+Inf"],h.counts):
+                    total+=n; lines.append(f"{name}_bucket{labels(route=route,le=bound)} {total}")
+                lines.append(f"{name}_sum{labels(route=route)} {h.sum:.6f}")
+                lines.append(f"{name}_count{labels(route=route)} {h.count}")
+        with self._lock:
+            family("http_requests_total","counter","Requests by route and status class")
+            for (route,status),n in sorted(self.requests.items()): lines.append(f"http_requests_total{labels(route=route,status=status)} {n}")
+            family("http_request_duration_seconds","histogram","Request wall time by route")
+            histogram("http_request_duration_seconds",self.durations)
+            family("http_request_db_queries","histogram","SQL queries per request by route")
+            histogram("http_request_db_queries",self.queries)
+            family("http_request_db_seconds_total","counter","Time spent in SQL by route")
+            for route,s in sorted(self.db.items()): lines.append(f"http_request_db_seconds_total{labels(route=route)} {s:.6f}")
+            family("http_request_external_seconds_total","counter","Time spent in external HTTP calls by route and service")
+            for (route,service),s in sorted(self.external.items()):
+                lines.append(f"http_request_external_seconds_total{labels(route=route,service=service)} {s:.6f}")
+            family("cache_requests_total","counter","Cache reads by cache and result")
+            for (cache,result),n in sorted(self.cache.items()): lines.append(f"cache_requests_total{labels(cache=cache,result=result)} {n}")
+            family("query_budget_exceeded_total","counter","Requests over their QUERY_BUDGETS limit")
+            for route,n in sorted(self.budget.items()): lines.append(f"query_budget_exceeded_total{labels(route=route)} {n}")
+        lines+=search_metrics()
+        return "\n".join(lines)+"\n"
+
+metrics=Metrics()
+
+def search_metrics():
+    """OpenSearch 客户端自带的统计：延迟直方图、错误/熔断拒绝/回退次数与熔断状态。"""
+    if not settings.OS_ENABLED: return []
+    from news.search import get_search_client
+    stats=get_search_client().stats(); lat=stats["latency_ms"]
+    lines=["# TYPE opensearch_search_latency_ms histogram"]
+    lines+=[f'opensearch_search_latency_ms_bucket{{le="{le}"}} {n}' for le,n in lat["buckets"].items()]
+    lines+=[f"opensearch_search_latency_ms_sum {lat['sum']}",f"opensearch_search_latency_ms_count {lat['count']}",
+            "# TYPE opensearch_search_events_total counter"]
+    lines+=[f'opensearch_search_events_total{{event="{k}"}} {stats[k]}' for k in ("errors","rejected","fallbacks")]
+    lines+=["# TYPE opensearch_breaker_open gauge",f"opensearch_breaker_open {int(stats['breaker']!='closed')}"]
+    return lines
+
+PROXY_HEADERS=("HTTP_X_FORWARDED_FOR","HTTP_X_REAL_IP","HTTP_FORWARDED")
+
+def metrics_allowed(request):
+    """METRICS_TOKEN（Authorization: Bearer）优先；否则按来源 IP，但经反向代理转发的请求一律拒绝：
+    nginx 回源时 REMOTE_ADDR 总是 127.0.0.1，只有不带转发头、直连应用端口的请求才看得到真实来源。"""
+    token=settings.METRICS_TOKEN
+    if token and constant_time_compare(request.headers.get("Authorization",""),f"Bearer {token}"): return True
+    if any(h in request.META for h in PROXY_HEADERS): return False
+    allowed=settings.METRICS_ALLOWED_IPS
+    return "*" in allowed or request.META.get("REMOTE_ADDR") in allowed
+
+def metrics_view(request):
+    if not metrics_allowed(request): return HttpResponseForbidden()
+    return HttpResponse(metrics.render(),content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ---- 中间件 ----
+
+def _db_wrapper(profile):
+    def wrapper(execute,sql,params,many,context):
+        start=time.perf_counter()
+        try:
+            return execute(sql,params,many,context)
+        finally:
+            profile.queries+=1; profile.db+=time.perf_counter()-start
+    return wrapper
+
+def server_timing(profile,elapsed):
+    parts=[f'db;dur={profile.db*1000:.1f};desc="{profile.queries} queries"']
+    if profile.cache:
+        parts.append('cache;desc="'+" ".join(f"{c}-{r}={n}" for (c,r),n in sorted(profile.cache.items()))+'"')
+    parts+=[f"ext-{s};dur={v*1000:.1f}" for s,v in profile.external.items()]
+    parts+=[f"{name};dur={v*1000:.1f}" for name,v in profile.spans.items()]
+    parts.append(f"total;dur={elapsed*1000:.1f}")
+    return ", ".join(parts)
+
+def check_budget(profile):
+    limit=settings.QUERY_BUDGETS.get(profile.route)
+    if limit is None or profile.queries<=limit: return
+    metrics.incr("budget",profile.route)
+    message=f"{profile.route}: {profile.queries} queries (budget {limit})"
+    if settings.QUERY_BUDGET_MODE=="raise": raise QueryBudgetExceeded(message)
+    logger.warning("query budget exceeded: %s",message)
+
+class ProfilingMiddleware:
+    """放在中间件链最前面，整页缓存命中也计入。"""
+    def __init__(self,get_response):
+        self.get_response=get_response
+
+    def __call__(self,request):
+        if not settings.PROFILING_ENABLED: return self.get_response(request)
+        profile=Profile(); token=_current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all(): stack.enter_context(conn.execute_wrapper(_db_wrapper(profile)))
+                response=self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed=time.perf_counter()-profile.start
+        if profile.route is None:
+            match=getattr(request,"resolver_match",None)
+            profile.route=(match.url_name or match.view_name) if match else None
+        metrics.observe(profile,response.status_code,elapsed)
+        if settings.PROFILING_SERVER_TIMING: response["Server-Timing"]=server_timing(profile,elapsed)
+        check_budget(profile)
+        return response
+
+    def process_view(self,request,view_func,view_args,view_kwargs):
+        profile=_current.get()
+        if profile is not None: profile.view_start=time.perf_counter()
+
+    def process_template_response(self,request,response):
+        # 视图返回 TemplateResponse：到这里为视图耗时，渲染在之后进行，用渲染回调收尾
+        profile=_current.get()
+        if profile is not None:
+            start=time.perf_counter()
+            profile.add_span("view",start-profile.view_start)
+            response.add_post_render_callback(lambda r:profile.add_span("render",time.perf_counter()-start))
+        return response
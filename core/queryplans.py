@@ -0,0 +1,81 @@
+import re
+from django.core.management.base import CommandError
+from django.db import connections, transaction
+
+# 查询计划回归检查：在冷缓存下请求首页、频道页与门户接口，记录实际执行的每条 SELECT，再逐条 EXPLAIN，
+# 出现下列情况即视为退化（manage.py check_query_plans 据此返回非零）：
+#   全表扫描 —— 行数不少于 min_rows 的表上没有走索引（SQLite 的 "SCAN 表"、Postgres 的 Seq Scan）；
+#   排序 —— 取前 N 条（LIMIT）或窗口排名（OVER）的语句需要额外排序（SQLite 的 TEMP B-TREE FOR ORDER BY、Postgres 的 Sort），
+#           排序代价随表大小增长；按 ID 列表回表后的排序只涉及几十行，不计。
+# Postgres 上关闭 enable_seqscan/enable_sort 后再 EXPLAIN：小表或统计信息不准时计划器本来就会选全表扫描，
+# 关闭后仍出现的扫描/排序才说明没有可用的索引。
+
+SQLITE_SCAN=re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+SQLITE_SORT=re.compile(r"USE TEMP B-TREE FOR .*ORDER BY")
+PG_SCAN=re.compile(r"Seq Scan on (\w+)")
+PG_SORT=re.compile(r"^\s*(?:->\s*)?Sort\b")
+TOP_N=re.compile(r"\bLIMIT\b|\bOVER\s*\(",re.I)
+VENDORS=("sqlite","postgresql")
+
+def capture(fn,using="default"):
+    """执行 fn，返回期间执行的 SELECT 语句 [(sql, params)]。"""
+    queries=[]
+    def wrapper(execute,sql,params,many,context):
+        if not many and sql.lstrip().upper().startswith("SELECT"): queries.append((sql,params))
+        return execute(sql,params,many,context)
+    with connections[using].execute_wrapper(wrapper):
+        fn()
+    return queries
+
+def explain(sql,params,using="default"):
+    conn=connections[using]
+    with transaction.atomic(using=using),conn.cursor() as cursor:
+        if conn.vendor=="sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN "+sql,params)
+            return [row[-1] for row in cursor.fetchall()]
+        if conn.vendor=="postgresql":
+            cursor.execute("SET LOCAL enable_seqscan=off"); cursor.execute("SET LOCAL enable_sort=off")
+            cursor.execute("EXPLAIN "+sql,params)
+            return [row[0] for row in cursor.fetchall()]
+    raise CommandError(f"query plan checks support SQLite and PostgreSQL, not {conn.vendor}")
+
+class PlanChecker:
+    """min_rows：少于这么多行的表允许全表扫描（站点、频道等配置表）。"""
+    def __init__(self,using="default",min_rows=1000):
+        self.using=using; self.min_rows=min_rows; self._rows={}
+        self.vendor=connections[using].vendor
+        # 其他数据库的 EXPLAIN 格式不同：在请求任何 URL 之前就报错
+        if self.vendor not in VENDORS: raise CommandError(f"query plan checks support SQLite and PostgreSQL, not {self.vendor}")
+        self.tables=set(connections[using].introspection.table_names())
+
+    def table_rows(self,table):
+        if table not in self._rows:
+            with connections[self.using].cursor() as cursor:
+                if self.vendor=="postgresql":
+                    cursor.execute("SELECT reltuples FROM pg_class WHERE relname=%s",[table])
+                else:
+                    cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+                row=cursor.fetchone()
+            self._rows[table]=int(row[0]) if row else 0
+        return self._rows[table]
+
+    def problems(self,sql,plan):
+        """返回计划中的问题描述列表。"""
+        scan,sort=(PG_SCAN,PG_SORT) if self.vendor=="postgresql" else (SQLITE_SCAN,SQLITE_SORT)
+        out=[]
+        for line in plan:
+            m=scan.search(line.strip())
+            # SQLite 的子查询/协程（subquery-N、CTE 名）也显示为 SCAN，只看真实存在的表
+            if m and m.group(1) in self.tables and self.table_rows(m.group(1))>=self.min_rows:
+                out.append(f"full scan of {m.group(1)} ({self.table_rows(m.group(1))} rows): {line.strip()}")
+            elif sort.search(line) and TOP_N.search(sql):
+                out.append(f"sort in a top-N query: {line.strip()}")
+        return out
+
+    def check(self,fn):
+        """执行 fn 并检查其中每条 SELECT；返回 [(sql, plan, problems)]。"""
+        out=[]
+        for sql,params in capture(fn,self.using):
+            plan=explain(sql,params,self.using)
+            out.append((sql,plan,self.problems(sql,plan)))
+        return out
@@ -0,0 +1,118 @@
+import threading, time, uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http.request import split_domain_port
+from wagtail.models import Site
+
+# 进程内的站点注册表：一次取回全部 Site（含 root_page）与 HomeToggles，按主机名匹配请求，热路径零查询。
+# Site/HomeToggles 保存或删除、首页发布时本进程立即失效，并递增共享缓存里的代号；
+# 其他进程每 SITE_REGISTRY_CHECK 秒比对一次代号，变化即重新加载。
+
+GENERATION_KEY="sites:registry:gen"
+
+class SiteRegistry:
+    def __init__(self):
+        self._lock=threading.Lock()
+        self._state=None; self._gen=None; self._checked=0.0
+
+    def _load(self):
+        from .models import HomeToggles
+        sites=list(Site.objects.select_related("root_page"))
+        toggles={t.site_id:t for t in HomeToggles.objects.filter(site__in=sites)}
+        # 缺失的设置用 bulk_create 补建（不触发 post_save，避免在持锁加载时自我失效）
+        missing=[HomeToggles(site=s) for s in sites if s.id not in toggles]
+        if missing:
+            HomeToggles.objects.bulk_create(missing,ignore_conflicts=True)
+            toggles={t.site_id:t for t in HomeToggles.objects.filter(site__in=sites)}
+        for s in sites: toggles[s.id].site=s
+        return {"sites":sites,"by_id":{s.id:s for s in sites},"toggles":toggles,
+                "default":next((s for s in sites if s.is_default_site),None)}
+
+    def _current(self):
+        now=time.monotonic()
+        if self._state is not None and now-self._checked<settings.SITE_REGISTRY_CHECK: return self._state
+        with self._lock:
+            if self._state is not None and now-self._checked<settings.SITE_REGISTRY_CHECK: return self._state
+            gen=cache.get(GENERATION_KEY)
+            if self._state is None or gen!=self._gen:
+                self._state=self._load(); self._gen=gen
+            self._checked=now
+            return self._state
+
+    def invalidate(self):
+        with self._lock:
+            self._state=None
+        cache.set(GENERATION_KEY,uuid.uuid4().hex,None)
+
+    def sites(self):
+        return self._current()["sites"]
+
+    def get(self,site_id):
+        return self._current()["by_id"].get(site_id)
+
+    def default(self):
+        return self._current()["default"]
+
+    def find(self,hostname,port=None):
+        """与 Site.find_for_request 相同的匹配顺序：主机名+端口、主机名+默认站点、唯一主机名、默认站点。"""
+        state=self._current()
+        matches=[s for s in state["sites"] if s.hostname==hostname]
+        for s in matches:
+            if port is not None and s.port==int(port): return s
+        for s in matches:
+            if s.is_default_site: return s
+        if len(matches)==1: return matches[0]
+        return state["default"]
+
+    def for_request(self,request):
+        hostname=split_domain_port(request._get_raw_host())[0]
+        return self.find(hostname,request.get_port())
+
+    def for_hostname(self,hostname):
+        return next((s for s in self.sites() if s.hostname==hostname),None)
+
+    def for_page(self,page):
+        """页面所属站点：根页面 path 是其前缀的站点中最深的那个（优先默认站点）。"""
+        best=None
+        for s in self.sites():
+            root=s.root_page.path
+            if page.path.startswith(root) and (best is None or len(root)>len(best.root_page.path)
+                                               or (root==best.root_page.path and s.is_default_site)):
+                best=s
+        return best
+
+    def toggles(self,site):
+        return self._current()["toggles"].get(site.id)
+
+    def home(self,site):
+        """站点根页面的具体实例；在注册表生命周期内缓存于 site.root_page 上。"""
+        return site.root_page.specific
+
+registry=SiteRegistry()
+
+def _invalidate(sender,**kwargs):
+    registry.invalidate()
+    if sender.__name__=="HomeToggles":
+        from .cache import bump_content_version
+        from .pagecache import purge_tags
+        from .snapshot import site_scope
+        bump_content_version(site_scope(kwargs["instance"].site_id))
+        purge_tags(f"site:{kwargs['instance'].site_id}")
+
+def connect_signals():
+    from .models import HomeToggles
+    for model in (Site,HomeToggles):
+        post_save.connect(_invalidate,sender=model,dispatch_uid=f"site-registry-save-{model.__name__}")
+        post_delete.connect(_invalidate,sender=model,dispatch_uid=f"site-registry-delete-{model.__name__}")
+
+class SiteRegistryMiddleware:
+    """把注册表解析出的站点与 HomeToggles 放到 request 上，Wagtail 的 Site.find_for_request / for_request 直接命中。"""
+    def __init__(self,get_response):
+        self.get_response=get_response
+    def __call__(self,request):
+        from .models import HomeToggles
+        site=registry.for_request(request)
+        request._wagtail_site=site
+        if site: setattr(request,HomeToggles.get_cache_attr_name(),registry.toggles(site))
+        return self.get_response(request)
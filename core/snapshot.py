@@ -0,0 +1,111 @@
+import hashlib
+from django.conf import settings as django_settings
+from .cache import swr_expire, swr_get, swr_peek, swr_set
+from .home import assemble_ids, article_base, candidate_k, channel_rows, featured_ids, hydrate, module_ids, module_specs
+from news.listing import order_fields
+from news.pagination import encode_position, position
+
+# 首页快照：每站点缓存精选与各模块的有序文章 ID。读路径只需一次缓存读 + 一次实例化查询；
+# 文章发布/撤回/删除时按频道增量重算，首页改版或 HomeToggles 变化时快照自动失效。
+
+SNAPSHOT_VERSION=2
+
+def snapshot_key(site_id):
+    return f"home:snap:{site_id}"
+
+def api_home_key(site_id):
+    return f"api:home:{site_id}"
+
+# 内容版本作用域（core.cache.content_version）：站点首页相关内容、跨站门户列表
+PORTAL_SCOPE="portal"
+
+def site_scope(site_id):
+    return f"site:{site_id}"
+
+def snapshot_version(page,settings):
+    cfg=[settings.default_limit,settings.only_with_image_default,settings.hot_time_window_hours,
+         settings.featured_target,settings.module_backfill_cross_channel,settings.featured_use_hot]
+    return f"{SNAPSHOT_VERSION}:{page.live_revision_id}:{cfg}"
+
+def _ver(items):
+    """模块片段版本：条目 ID 与各自的最后发布时间，条目不变但被重新发布（改标题、换图）时片段同样失效。"""
+    raw=",".join(f"{a.id}:{a.last_published_at.timestamp() if a.last_published_at else 0}" for a in items)
+    return hashlib.md5(raw.encode()).hexdigest()[:12]
+
+def _pack(specs,fids,mids):
+    return {"featured":fids,
+            "modules":[{"title":s["title"],"sig":s["sig"],"channel_id":s["channel"].id,"channel_slug":getattr(s["channel"],"slug",None),
+                        "ordering":s["ordering"],"more":len(m)>=s["limit"],"ids":m} for s,m in zip(specs,mids)]}
+
+def _store(page,site,settings,snap):
+    return swr_set(snapshot_key(site.id),snap,django_settings.HOME_SNAPSHOT_TTL,snapshot_version(page,settings))
+
+def build_home_snapshot(page,site,settings):
+    specs,fids,mids=assemble_ids(page,site,settings)
+    return _store(page,site,settings,_pack(specs,fids,mids))
+
+def get_home_snapshot(page,site,settings):
+    # 首页改版或设置变化会改变版本号：旧快照在重建期间继续提供服务
+    return swr_get(snapshot_key(site.id),lambda:_pack(*assemble_ids(page,site,settings)),
+                   django_settings.HOME_SNAPSHOT_TTL,snapshot_version(page,settings))
+
+def invalidate_home_snapshot(site):
+    swr_expire(snapshot_key(site.id))
+
+def home_from_snapshot(snap):
+    """把快照还原成模板/接口使用的 (featured, modules)。"""
+    featured,items=hydrate(snap["featured"],[m["ids"] for m in snap["modules"]])
+    return featured,[{"title":m["title"],"items":it,"sig":m["sig"],"channel_slug":m["channel_slug"],"ver":_ver(it),
+                      "next":more_cursor(m["ordering"],it[-1]) if m["more"] and it else None}
+                     for m,it in zip(snap["modules"],items)]
+
+def more_cursor(ordering,last):
+    """“加载更多”的续读游标：模块最后一条在该模块排序下的位置。"""
+    return encode_position(position(last,order_fields(ordering,"id")))
+
+def shown_ids(snap):
+    return set(snap["featured"]).union(*(m["ids"] for m in snap["modules"]))
+
+def rebuild_home_snapshot(site,article):
+    """文章变化后增量更新：只重算文章所属频道或曾展示该文章的模块；去重关系受影响时退回全量重建。"""
+    from .models import HomePage
+    from .sites import registry
+    from news.models import ArticlePage
+    page=registry.home(site)
+    if not isinstance(page,HomePage): return None
+    settings=registry.toggles(site)
+    prev=swr_peek(snapshot_key(site.id),snapshot_version(page,settings))
+    if not prev or settings.module_backfill_cross_channel:
+        return build_home_snapshot(page,site,settings)
+    specs=module_specs(page,settings)
+    if [(m["title"],m["sig"]) for m in prev["modules"]]!=[(s["title"],s["sig"]) for s in specs]:
+        return build_home_snapshot(page,site,settings)
+    base=article_base(site)
+    fids=featured_ids(page,site,settings,base)
+    if fids!=prev["featured"]: return build_home_snapshot(page,site,settings)
+    through=ArticlePage.channels.through
+    chs=set(through.objects.filter(articlepage_id=article.id).values_list("channel_id",flat=True))
+    dirty={i for i,(s,m) in enumerate(zip(specs,prev["modules"])) if s["channel"].id in chs or article.id in m["ids"]}
+    if not dirty: return prev
+    selected_ids=set(fids)
+    by_ch=channel_rows(site,specs,candidate_k(specs,selected_ids),{specs[i]["channel"].id for i in dirty})
+    mids=[]; released={}; owner={}
+    for i,(s,m) in enumerate(zip(specs,prev["modules"])):
+        if i in dirty:
+            items=module_ids(s,by_ch,[],selected_ids)
+            for a in set(m["ids"])-set(items): released.setdefault(a,i)
+        else:
+            items=m["ids"]
+            # 前面的模块新占用了本模块的条目
+            if selected_ids&set(items): return build_home_snapshot(page,site,settings)
+        for a in items: owner[a]=i
+        selected_ids|=set(items); mids.append(items)
+    if released:
+        # 第 i 个模块让出的条目（即使又被后面的模块选中）：位于 i 与新占用者之间、频道相同的未重算模块本可以选它，需要全量重建
+        from news.models import ArticleListing
+        clean={i:s["channel"].id for i,s in enumerate(specs) if i not in dirty}
+        rows=ArticleListing.objects.filter(site_id=site.id,article_id__in=released,channel_id__in=set(clean.values()))
+        for a,ch in rows.values_list("article_id","channel_id"):
+            if any(released[a]<j<owner.get(a,len(specs)) and c==ch for j,c in clean.items()):
+                return build_home_snapshot(page,site,settings)
+    return _store(page,site,settings,_pack(specs,fids,mids))
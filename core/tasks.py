@@ -0,0 +1,21 @@
+from django.db import transaction
+from django_tasks import task
+
+# 发布后增量预渲染：钩子投递任务，worker 先补齐文章图片渲染（避免写出不完整的页面），再重渲染受影响的路径。
+
+def enqueue_prerender(site_id,paths,removed=(),article_id=None):
+    transaction.on_commit(lambda:prerender_paths.enqueue(site_id,list(paths),list(removed),article_id))
+
+@task()
+def prerender_paths(site_id,paths,removed,article_id=None):
+    from news.models import ArticlePage
+    from news.renditions import render_jobs
+    from news.tasks import article_rendition_jobs
+    from .prerender import remove_path, run
+    from .sites import registry
+    site=registry.get(site_id)
+    if site is None: return {}
+    for path in removed: remove_path(site,path)
+    article=ArticlePage.objects.filter(id=article_id).first() if article_id else None
+    if article: render_jobs({str(k):v for k,v in article_rendition_jobs(article).items()})
+    return run([(site_id,p) for p in dict.fromkeys(paths)])
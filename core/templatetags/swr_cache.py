@@ -0,0 +1,31 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from core.cache import swr_get
+
+register=template.Library()
+
+# 用法同 {% cache %}，额外支持 version=...：版本变化时旧片段在单个 worker 重渲染期间继续输出
+# {% swrcache 300 "home" page.id m.title m.sig version=m.ver %}...{% endswrcache %}
+
+class SwrCacheNode(template.Node):
+    def __init__(self,nodelist,expire_time,fragment_name,vary_on,version):
+        self.nodelist=nodelist; self.expire_time=expire_time; self.fragment_name=fragment_name
+        self.vary_on=vary_on; self.version=version
+    def render(self,context):
+        expire_time=int(self.expire_time.resolve(context))
+        key=make_template_fragment_key(self.fragment_name,[v.resolve(context) for v in self.vary_on])
+        version=self.version.resolve(context) if self.version else None
+        return swr_get(key,lambda:self.nodelist.render(context),expire_time,version)
+
+@register.tag("swrcache")
+def do_swrcache(parser,token):
+    nodelist=parser.parse(("endswrcache",))
+    parser.delete_first_token()
+    tokens=token.split_contents()
+    if len(tokens)<3:
+        raise template.TemplateSyntaxError(f"'{tokens[0]}' tag requires at least 2 arguments.")
+    version=None
+    if tokens[-1].startswith("version="):
+        version=parser.compile_filter(tokens.pop()[len("version="):])
+    return SwrCacheNode(nodelist,parser.compile_filter(tokens[1]),tokens[2].strip("\"'"),
+                        [parser.compile_filter(t) for t in tokens[3:]],version)
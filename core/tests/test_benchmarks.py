@@ -0,0 +1,37 @@
+import json
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+def test_report_covers_every_scenario(news_sites,tmp_path):
+    out=tmp_path/"report.json"
+    call_command("run_benchmarks","--iterations","2","--output",str(out),stderr=StringIO())
+    report=json.loads(out.read_text(encoding="utf-8"))
+    assert report["meta"]["site"]=="media1.local"
+    assert report["meta"]["site_articles"]==30 and report["meta"]["iterations"]==2
+    assert set(report["results"])=={"home","channel","article","api_home","api_portal","api_portal_channel"}
+    for r in report["results"].values():
+        assert r["cold"]["queries"]>0
+        w=r["warm"]
+        assert 0<w["min_ms"]<=w["p50_ms"]<=w["p95_ms"] and w["bytes"]>0 and w["peak_kb"]>=0
+
+def test_compare_and_filters(news_sites,tmp_path,capsys):
+    base=tmp_path/"base.json"
+    call_command("run_benchmarks","--iterations","1","--no-cold","--only","home,api_portal","--output",str(base))
+    report=json.loads(base.read_text(encoding="utf-8"))
+    assert set(report["results"])=={"home","api_portal"} and "cold" not in report["results"]["home"]
+    call_command("run_benchmarks","--iterations","1","--no-cold","--only","home","--compare",str(base))
+    err=capsys.readouterr().err
+    assert "home" in err and "warm.p50_ms" in err
+
+@pytest.mark.parametrize("args",[("--iterations","0"),("--site","unknown.example")])
+def test_invalid_options(news_sites,args):
+    with pytest.raises(CommandError):
+        call_command("run_benchmarks",*args)
+
+@pytest.mark.parametrize("args",[("--days","0"),("--count","0"),("--batch-size","0"),
+                                 ("--image-ratio","1.5"),("--featured-ratio","-0.1")])
+def test_generate_articles_rejects_invalid_options(db,args):
+    with pytest.raises(CommandError):
+        call_command("generate_articles",*args)
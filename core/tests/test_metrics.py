@@ -0,0 +1,29 @@
+import pytest
+from django.test import Client, override_settings
+
+URL="/metrics"
+
+@pytest.fixture
+def client(db):
+    return Client(HTTP_HOST="localhost")
+
+def test_loopback_allowed(client):
+    assert client.get(URL).status_code==200
+
+def test_other_addresses_denied(client):
+    assert client.get(URL,REMOTE_ADDR="10.0.0.5").status_code==403
+
+@pytest.mark.parametrize("header",["HTTP_X_FORWARDED_FOR","HTTP_X_REAL_IP","HTTP_FORWARDED"])
+def test_proxied_requests_denied_even_from_loopback(client,header):
+    # nginx 回源：REMOTE_ADDR 是 127.0.0.1，真实来源在转发头里
+    assert client.get(URL,**{header:"203.0.113.9"}).status_code==403
+
+@override_settings(METRICS_ALLOWED_IPS=["*"])
+def test_wildcard_still_denies_proxied(client):
+    assert client.get(URL,REMOTE_ADDR="10.0.0.5").status_code==200
+    assert client.get(URL,HTTP_X_FORWARDED_FOR="203.0.113.9").status_code==403
+
+@override_settings(METRICS_TOKEN="s3cret")
+def test_token_allows_proxied_scrapes(client):
+    assert client.get(URL,HTTP_X_FORWARDED_FOR="203.0.113.9",HTTP_AUTHORIZATION="Bearer s3cret").status_code==200
+    assert client.get(URL,HTTP_X_FORWARDED_FOR="203.0.113.9",HTTP_AUTHORIZATION="Bearer nope").status_code==403
@@ -0,0 +1,41 @@
+import pytest
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from core.queryplans import PlanChecker
+from news.listing import listing, order_fields
+from news.models import ArticleListing
+
+def run(checker,fn):
+    results=checker.check(fn)
+    assert results and all(sql.lstrip().upper().startswith("SELECT") for sql,_,_ in results)
+    return [p for _,_,problems in results for p in problems]
+
+def test_indexed_listing_query_passes(news_sites):
+    site=news_sites[0]
+    problems=run(PlanChecker(min_rows=10),lambda:list(listing(site).order_by(*order_fields("-date"))[:20]))
+    assert problems==[]
+
+def test_full_scan_is_flagged(news_sites):
+    problems=run(PlanChecker(min_rows=10),lambda:list(ArticleListing.objects.filter(title__contains="报道")))
+    assert any(p.startswith("full scan of news_articlelisting") for p in problems)
+
+def test_small_tables_may_be_scanned(news_sites):
+    checker=PlanChecker(min_rows=10**6)
+    assert run(checker,lambda:list(ArticleListing.objects.filter(title__contains="报道")))==[]
+
+def test_top_n_sort_is_flagged(news_sites):
+    problems=run(PlanChecker(min_rows=10**6),lambda:list(ArticleListing.objects.order_by("title")[:5]))
+    assert any(p.startswith("sort in a top-N query") for p in problems)
+
+def test_unsupported_database(db):
+    with mock.patch("core.queryplans.connections") as conns:
+        conns.__getitem__.return_value.vendor="mysql"
+        with pytest.raises(CommandError):
+            PlanChecker()
+
+def test_check_query_plans_command(news_sites):
+    out=StringIO()
+    call_command("check_query_plans","--min-rows","50",stdout=out)
+    assert "all queries use indexes" in out.getvalue()
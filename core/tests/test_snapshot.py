@@ -0,0 +1,35 @@
+import random
+from datetime import timedelta
+from django.utils import timezone
+from core.home import assemble_ids
+from core.models import HomeToggles
+from core.sites import registry
+from core.snapshot import build_home_snapshot, rebuild_home_snapshot
+from news.listing import sync
+from news.models import ArticlePage, Channel
+
+def home_with_modules(site,slugs,limit=3):
+    """首页挂上若干频道模块（频道可重复，文章多属几个频道，模块之间的去重相互影响）。"""
+    HomeToggles.objects.update_or_create(site=site,defaults={"featured_target":0,"only_with_image_default":False})
+    page=site.root_page.specific
+    page.modules=[("channel",{"channel":Channel.objects.get(slug=s),"limit":limit,"ordering":"-date","title":f"{s}-{n}"})
+                  for n,s in enumerate(slugs)]
+    page.save_revision().publish()
+    registry.invalidate()
+    return registry.home(registry.get(site.id)),registry.get(site.id)
+
+def test_incremental_rebuild_matches_full_build(news_sites):
+    page,site=home_with_modules(news_sites[0],["tech","finance","sports","tech","finance","sports"])
+    settings=registry.toggles(site)
+    build_home_snapshot(page,site,settings)
+    rnd=random.Random(7); now=timezone.now()
+    articles=list(ArticlePage.objects.listed(site).order_by("id"))
+    for step in range(60):
+        a=rnd.choice(articles)
+        # 改发布时间：文章在各模块里的名次变化，可能被前面的模块选中或让出位置
+        ArticlePage.objects.filter(id=a.id).update(date=now-timedelta(hours=rnd.randrange(24*365)))
+        sync([a.id])
+        snap=rebuild_home_snapshot(site,a)
+        _,fids,mids=assemble_ids(page,site,settings)
+        assert [m["ids"] for m in snap["modules"]]==mids,f"step {step}: article {a.id}"
+        assert snap["featured"]==fids
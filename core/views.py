@@ -0,0 +1,96 @@
+import gzip
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from wagtail.models import Site
+from news.listing import hydrate as hydrate_listing, listing, order_fields as listing_order
+from news.models import ArticleListing, CARD_RENDITION
+from news.pagination import after_position, decode_position, encode_position, position
+from .home import module_specs
+from .models import HomePage
+from .cache import content_version, swr_get
+from .pagecache import add_cache_tags
+from .sites import registry
+from .snapshot import get_home_snapshot, shown_ids, site_scope
+
+def more_items(request):
+    """首页模块“加载更多”片段：?sig=<模块签名>&after=<续读游标>，按模块的频道/排序/有图规则返回下一页卡片。
+    首页已展示的条目（精选与各模块）一律排除；响应按 URL（即每个游标）进入整页缓存，发布时按站点/频道标签清除。"""
+    site=Site.find_for_request(request)
+    home=registry.home(site) if site else None
+    if not isinstance(home,HomePage): raise Http404
+    toggles=registry.toggles(site)
+    spec=next((s for s in module_specs(home,toggles) if s["sig"]==request.GET.get("sig")),None)
+    if spec is None: raise Http404
+    fields=listing_order(spec["ordering"])
+    after=decode_position(request.GET.get("after"),fields,ArticleListing)
+    if after is None: return HttpResponseBadRequest("invalid cursor")
+    qs=listing(site,spec["channel"]).exclude(article_id__in=shown_ids(get_home_snapshot(home,site,toggles)))
+    if spec["only_img"]: qs=qs.filter(has_image=True)
+    limit=spec["limit"]
+    rows=list(after_position(qs,fields,after)[:limit+1])
+    items=hydrate_listing(rows[:limit],CARD_RENDITION)
+    next_cursor=encode_position(position(rows[limit-1],fields)) if len(rows)>limit else None
+    add_cache_tags(request,f"site:{site.id}",f"channel:{spec['channel'].slug}")
+    response=render(request,"fragments/more_items.html",{"items":items,"sig":spec["sig"],"next_cursor":next_cursor})
+    patch_cache_control(response,public=True,max_age=settings.API_MAX_AGE)
+    return response
+
+def _site(request):
+    site=Site.find_for_request(request)
+    if site is None: raise Http404
+    return site
+
+def _channel(slug):
+    from news.feeds import active_channel
+    channel=active_channel(slug) if slug else None
+    if slug and channel is None: raise Http404
+    return channel
+
+def _xml(body,max_age):
+    response=HttpResponse(body,content_type="application/xml; charset=utf-8")
+    patch_cache_control(response,public=True,max_age=max_age)
+    return response
+
+def sitemap_index(request,channel=None):
+    """站点（或频道）的分片索引；按对应作用域的内容版本缓存，任一分片失效时一起失效。"""
+    from news import sitemaps
+    site=_site(request); _channel(channel)
+    body=swr_get(f"sitemap:index:{site.id}:{channel or ''}",lambda:sitemaps.index_xml(site,channel),
+                 settings.SITEMAP_TTL,content_version(sitemaps.scope(site.id,channel)))
+    return _xml(body,settings.API_MAX_AGE)
+
+def sitemap_pages(request):
+    from news import sitemaps
+    site=_site(request)
+    body=swr_get(f"sitemap:pages:{site.id}",lambda:sitemaps.pages_xml(site),settings.SITEMAP_TTL,content_version(site_scope(site.id)))
+    return _xml(body,settings.API_MAX_AGE)
+
+def sitemap_shard(request,shard,channel=None):
+    """一个 gzip 分片：有版本一致的缓存直接返回，否则边查边压缩流式返回（结束后写入缓存）；没有文章的分片 404。"""
+    from news import sitemaps
+    site=_site(request); _channel(channel)
+    body=sitemaps.cached_shard(site,channel,shard)
+    if body is not None: response=HttpResponse(body,content_type="application/gzip")
+    elif not sitemaps.shard_exists(site,channel,shard): raise Http404
+    else: response=StreamingHttpResponse(sitemaps.stream_shard(site,channel,shard),content_type="application/gzip")
+    patch_cache_control(response,public=True,max_age=settings.API_MAX_AGE)
+    return response
+
+def feed(request,kind,channel=None):
+    """RSS/Atom：按站点内容版本缓存正文与 gzip 副本，客户端接受 gzip 时直接返回压缩版本。"""
+    from news.feeds import FEED_CLASSES, build_feed
+    if kind not in FEED_CLASSES: raise Http404
+    site=_site(request); ch=_channel(channel)
+    def build():
+        body,content_type=build_feed(site,kind,ch)
+        return {"body":body,"gz":gzip.compress(body,6),"type":content_type}
+    entry=swr_get(f"feed:{site.id}:{channel or ''}:{kind}",build,settings.FEED_TTL,content_version(site_scope(site.id)))
+    if "gzip" in request.headers.get("Accept-Encoding",""):
+        response=HttpResponse(entry["gz"],content_type=entry["type"]); response["Content-Encoding"]="gzip"
+    else:
+        response=HttpResponse(entry["body"],content_type=entry["type"])
+    response["Vary"]="Accept-Encoding"
+    patch_cache_control(response,public=True,max_age=settings.API_MAX_AGE)
+    return response
@@ -1,29 +1,91 @@
 from wagtail import hooks
-from django.core.cache import caches
-from django.core.cache.utils import make_template_fragment_key
-from .models import HomeToggles
+from wagtail.models import Page
+from .models import HomePage
+from .cache import bump_content_version
+from .pagecache import add_cache_tags, purge_tags
+from .profiling import set_route
+from .sites import registry
+from .snapshot import PORTAL_SCOPE, invalidate_home_snapshot, rebuild_home_snapshot, site_scope
 
 @hooks.register("after_publish_page")
-def purge_home_cache_on_publish(request, page):
-    cache=caches["default"]
-    try:
-        site=page.get_site()
-    except Exception:
-        site=None
-    if not site:
-        cache.clear(); return
-    home=site.root_page.specific
-    try:
-        modules=getattr(home,"modules",[])
-    except Exception:
-        modules=[]
-    settings=HomeToggles.for_site(site)
-    for block in modules:
-        b=block.value
-        title=b.get("title") or getattr(b.get("channel"),"name",None)
-        if not title: continue
-        ordering=b.get("ordering"); limit=b.get("limit"); only_img=b.get("only_with_image")
-        ch=b.get("channel"); ch_slug=getattr(ch,"slug","na") if ch else "na"
-        sig=f"ch:{ch_slug}|ord:{ordering}|lim:{limit}|img:{only_img}|xch:{settings.module_backfill_cross_channel}"
-        key=make_template_fragment_key("home",[str(site.id),title,sig])
-        cache.delete(key)
+@hooks.register("after_unpublish_page")
+@hooks.register("after_delete_page")
+def refresh_home_snapshot(request, page):
+    from news.models import ArticlePage
+    site=registry.for_page(page)
+    if not site: return
+    # 首页片段按模块条目版本（m.ver）校验，快照更新后旧片段在重渲染期间继续输出
+    cls=page.specific_class
+    if cls and issubclass(cls,HomePage):
+        # 注册表缓存了站点根页面实例，首页发布后需重新加载
+        registry.invalidate(); invalidate_home_snapshot(site)
+        bump_content_version(site_scope(site.id))
+    elif cls and issubclass(cls,ArticlePage):
+        rebuild_home_snapshot(site,page)
+        # 接口响应缓存与 ETag 随内容版本变化
+        bump_content_version(site_scope(site.id),PORTAL_SCOPE)
+
+@hooks.register("before_serve_page")
+def name_profiled_route(page, request, serve_args, serve_kwargs):
+    # 剖析与查询预算按页面类型区分 Wagtail 页面（URL 名称都是 wagtail_serve）
+    set_route(f"page:{type(page).__name__}")
+
+@hooks.register("before_serve_page")
+def tag_page_cache(page, request, serve_args, serve_kwargs):
+    tags=[f"page:{page.id}"]
+    site=getattr(request,"_wagtail_site",None)
+    if site and isinstance(page,HomePage): tags.append(f"site:{site.id}")
+    add_cache_tags(request,*tags)
+
+@hooks.register("before_publish_page")
+@hooks.register("before_unpublish_page")
+@hooks.register("before_delete_page")
+def remember_channels(request, page):
+    # 变更前文章所在的频道：此时列表读模型还未被 page_published 信号改写（删除时也还未级联），
+    # 移出的频道页同样列着这篇文章，after_* 钩子里与新频道一起清除/重渲染
+    from news.models import ArticleListing
+    rows=ArticleListing.objects.filter(article_id=page.id,channel__isnull=False)
+    request._previous_channels={**getattr(request,"_previous_channels",{}),page.id:set(rows.values_list("channel__slug",flat=True))}
+
+def changed_channels(request, page):
+    """文章变更前后所在频道的 slug 并集。"""
+    slugs=set(getattr(request,"_previous_channels",{}).get(page.id,()))
+    return sorted(slugs|{c.slug for c in page.specific.channels.all()})
+
+@hooks.register("after_publish_page")
+@hooks.register("after_unpublish_page")
+@hooks.register("after_delete_page")
+def purge_page_cache(request, page):
+    from news.models import ArticlePage
+    tags=[f"page:{page.id}"]
+    # 父页面（栏目页）列出子页面
+    tags+=[f"page:{i}" for i in Page.objects.filter(path=page.path[:-Page.steplen]).values_list("id",flat=True)]
+    site=registry.for_page(page)
+    cls=page.specific_class
+    if site and cls and issubclass(cls,(HomePage,ArticlePage)): tags.append(f"site:{site.id}")
+    if cls and issubclass(cls,ArticlePage): tags+=[f"channel:{slug}" for slug in changed_channels(request,page)]
+    purge_tags(*tags)
+
+@hooks.register("after_publish_page")
+@hooks.register("after_unpublish_page")
+@hooks.register("after_delete_page")
+def prerender_static_pages(request, page):
+    from django.conf import settings
+    from news.models import ArticlePage
+    from .prerender import article_targets, channel_paths
+    from .tasks import enqueue_prerender
+    if not settings.PRERENDER_ENABLED: return
+    site=registry.for_page(page)
+    cls=page.specific_class
+    if not site or not cls: return
+    if issubclass(cls,HomePage):
+        enqueue_prerender(site.id,["/"])
+    elif issubclass(cls,ArticlePage):
+        article=page.specific
+        paths=article_targets(site,article)
+        paths+=[p for p in channel_paths(site,changed_channels(request,page)) if p not in paths]
+        # 仍在线：重渲染文章本身；撤回或删除：删掉静态文件，只重渲染列表页
+        if ArticlePage.objects.listed().filter(id=page.id).exists():
+            enqueue_prerender(site.id,paths,article_id=page.id)
+        else:
+            enqueue_prerender(site.id,paths[1:],removed=paths[:1])
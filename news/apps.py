@@ -2,3 +2,7 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "news"
+    def ready(self):
+        from .listing import connect_signals
+        from .tasks import connect_search_signals
+        connect_signals(); connect_search_signals()
@@ -0,0 +1,77 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+from wagtail.models import Page
+from .listing import sync as sync_listing
+from .models import ArticlePage
+
+# 批量建文章页：逐页 add_child + save_revision().publish() 每篇要十几条 SQL 外加一条修订记录，
+# 这里在父页面行锁内一次分配 treebeard 路径，Page 表 bulk_create，ArticlePage 子表按本表字段批量 INSERT，
+# 频道/标签写中间表，并同步列表读模型。页面直接处于已发布状态（live，没有修订记录，第一次在后台保存时才生成）。
+# 压测数据生成（generate_articles）与批量导入共用。
+
+def allocate_paths(parent,n):
+    """在 parent 下顺延分配 n 个子路径（与 treebeard 的 add_child 一致：接在最后一个子节点之后）。调用方需持有父页面行锁。"""
+    depth=parent.depth+1
+    last=Page.objects.filter(path__startswith=parent.path,depth=depth).order_by("-path").values_list("path",flat=True).first()
+    start=Page._str2int(last[-Page.steplen:])+1 if last else 1
+    if start+n-1>=len(Page.alphabet)**Page.steplen:
+        raise ValueError(f"{parent} cannot hold {n} more children")
+    return [Page._get_path(parent.path,depth,start+i) for i in range(n)]
+
+def bulk_create_articles(parent,articles,channel_ids=None,tag_names=None):
+    """articles: 未保存的 ArticlePage（title/slug/date 等已赋值）；channel_ids / tag_names: 与之一一对应的频道 ID / 标签名列表。
+    返回带 pk 的 articles。"""
+    if not articles: return articles
+    db=router.db_for_write(Page); now=timezone.now()
+    ct=ContentType.objects.get_for_model(ArticlePage)
+    with transaction.atomic(using=db):
+        parent=Page.objects.select_for_update().get(pk=parent.pk)
+        for a,path in zip(articles,allocate_paths(parent,len(articles))):
+            a.path=path; a.depth=parent.depth+1; a.numchild=0
+            a.url_path=f"{parent.url_path}{a.slug}/"
+            a.content_type=ct; a.locale_id=parent.locale_id
+            a.live=True; a.has_unpublished_changes=False; a.draft_title=a.title
+            a.first_published_at=a.first_published_at or now; a.last_published_at=a.last_published_at or now
+        pages=[Page(**{f.attname:getattr(a,f.attname) for f in Page._meta.concrete_fields}) for a in articles]
+        Page.objects.using(db).bulk_create(pages)
+        for a,p in zip(articles,pages): a.page_ptr_id=p.pk
+        # 多表继承的模型不能 bulk_create：父表已写入，子表只插入本表字段
+        fields=ArticlePage._meta.local_concrete_fields
+        size=connections[db].ops.bulk_batch_size(fields,articles) or len(articles)
+        for i in range(0,len(articles),size):
+            ArticlePage._base_manager.using(db)._insert(articles[i:i+size],fields=fields,using=db,raw=True)
+        Page.objects.using(db).filter(pk=parent.pk).update(numchild=F("numchild")+len(articles))
+        if channel_ids or tag_names: replace_relations(articles,channel_ids,tag_names)
+        sync_listing([a.pk for a in articles])
+    return articles
+
+def tag_ids(names):
+    """标签名 -> Tag ID；缺失的批量创建（slug 冲突的少数名字退回逐个 get_or_create）。"""
+    from taggit.models import Tag
+    names=list(dict.fromkeys(n for n in names if n))
+    if not names: return {}
+    found=dict(Tag.objects.filter(name__in=names).values_list("name","id"))
+    missing=[n for n in names if n not in found]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=n,slug=Tag().slugify(n)) for n in missing],ignore_conflicts=True)
+        found.update(Tag.objects.filter(name__in=missing).values_list("name","id"))
+        for n in missing:
+            if n not in found: found[n]=Tag.objects.get_or_create(name=n)[0].id
+    return found
+
+def replace_relations(articles,channel_ids=None,tag_names=None):
+    """整体替换文章的频道/标签（None 表示不改动）；articles 与两个列表一一对应。"""
+    from .models import ArticleTag
+    ids=[a.pk for a in articles]
+    if channel_ids is not None:
+        through=ArticlePage.channels.through
+        through.objects.filter(articlepage_id__in=ids).delete()
+        through.objects.bulk_create([through(articlepage_id=a.pk,channel_id=c) for a,cs in zip(articles,channel_ids) for c in cs],
+                                    ignore_conflicts=True)
+    if tag_names is not None:
+        by_name=tag_ids(n for names in tag_names for n in names)
+        ArticleTag.objects.filter(content_object_id__in=ids).delete()
+        ArticleTag.objects.bulk_create([ArticleTag(content_object_id=a.pk,tag_id=by_name[n])
+                                        for a,names in zip(articles,tag_names) for n in dict.fromkeys(names) if n in by_name])
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from .indexing import article_url, site_url_prefix
+from .listing import listing
+from .models import ArticlePage, Channel
+
+# RSS 2.0 / Atom：每个站点与每个频道的最新 FEED_SIZE 篇。生成结果按站点内容版本缓存（文章发布时递增），
+# 摘要取正文第一段，分类为文章所属频道。
+
+FEED_CLASSES={"rss":Rss201rev2Feed,"atom":Atom1Feed}
+
+def _summary(article):
+    for block in article.body:
+        if block.block_type=="paragraph" and block.value: return str(block.value)
+    return ""
+
+def build_feed(site,kind,channel=None):
+    """返回 (bytes, content_type)；channel 为 Channel 实例或 None。"""
+    # 最新 N 篇按列表读模型的 (站点, 频道, 日期) 索引取 ID，再按 ID 回表取正文
+    ids=list(listing(site,channel).order_by("-date","-article_id").values_list("article_id",flat=True)[:settings.FEED_SIZE])
+    found={a.id:a for a in ArticlePage.objects.filter(id__in=ids).only("id","title","url_path","date","last_published_at","body")
+           .prefetch_related("channels")}
+    items=[found[i] for i in ids if i in found]
+    prefix=site_url_prefix(site)
+    name=site.site_name or site.hostname
+    path=f"/feeds/{channel.slug}/{kind}.xml" if channel else f"/feeds/{kind}.xml"
+    feed=FEED_CLASSES[kind](title=f"{name} - {channel.name}" if channel else name,link=site.root_url+"/",
+                            description=f"{name} 最新文章",language="zh-cn",feed_url=site.root_url+path)
+    for a in items:
+        url=article_url(prefix,a.url_path)
+        feed.add_item(title=a.title,link=url,unique_id=url,description=_summary(a),pubdate=a.date,
+                      updateddate=a.last_published_at,categories=[c.name for c in a.channels.all()])
+    return feed.writeString("utf-8").encode(),feed.content_type
+
+def active_channel(slug):
+    return Channel.objects.filter(slug=slug,is_active=True).first()
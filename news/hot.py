@@ -0,0 +1,185 @@
+import logging, math, os, threading, time, uuid
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+# 热度排行：浏览/点击只在缓冲里累加（配置 REDIS_URL 时是共享的 Redis 哈希，否则是进程内计数 + 后台线程定期刷写），
+# 批量写入 ArticleStats。热度按半衰期 HOT_HALF_LIFE_HOURS 指数衰减，以对数形式存储相对固定纪元 T0 的值：
+#     log_score = ln Σ 权重·e^(λ·(t−T0))，λ = ln2 / 半衰期
+# 任意时刻的当前热度 = e^(log_score − λ·(now−T0))，排序与 now 无关，可以直接按 log_score 建索引排序。
+# refresh_hot_rankings 定期把每个站点、每个站点×频道的前 HOT_TOP_K 篇写入 HotRanking，读取方常数时间取用。
+
+EPOCH=datetime(2024,1,1,tzinfo=dt_timezone.utc).timestamp()
+BUFFER_KEY="hot:buffer"
+RANKING_SCOPE="hot"
+
+def decay_rate():
+    return math.log(2)/(settings.HOT_HALF_LIFE_HOURS*3600)
+
+def event_log_score(kind,count,ts):
+    return math.log(settings.HOT_WEIGHTS[kind]*count)+decay_rate()*(ts-EPOCH)
+
+def log_add(a,b):
+    if a is None: return b
+    hi,lo=max(a,b),min(a,b)
+    return hi+math.log1p(math.exp(lo-hi))
+
+def current_score(log_score,now=None):
+    if log_score is None: return 0.0
+    return math.exp(log_score-decay_rate()*((now or time.time())-EPOCH))
+
+def score_floor(now=None):
+    """当前热度 ≥ HOT_MIN_SCORE 对应的 log_score 下限。"""
+    return math.log(settings.HOT_MIN_SCORE)+decay_rate()*((now or time.time())-EPOCH)
+
+# ---- 计数缓冲 ----
+
+class LocalBuffer:
+    """进程内计数；每个进程第一次写入时启动守护线程，每 HOT_FLUSH_INTERVAL 秒刷写一次。"""
+    def __init__(self):
+        self._lock=threading.Lock(); self._counts=Counter(); self._pid=None
+
+    def incr(self,article_id,kind,n=1):
+        with self._lock:
+            if self._pid!=os.getpid():
+                # fork 之后线程不会被复制，继承来的计数由父进程负责刷写：按进程号重新启动并清空
+                self._pid=os.getpid(); self._counts=Counter()
+                threading.Thread(target=self._loop,name="hot-flush",daemon=True).start()
+            self._counts[(int(article_id),kind)]+=n
+
+    def drain(self):
+        with self._lock:
+            counts,self._counts=self._counts,Counter()
+        return counts
+
+    def restore(self,counts):
+        with self._lock: self._counts.update(counts)
+
+    def _loop(self):
+        while True:
+            time.sleep(settings.HOT_FLUSH_INTERVAL)
+            counts=self.drain()
+            try:
+                apply_counts(counts)
+            except Exception:
+                # 写库失败：计数放回缓冲，下一轮重试
+                self.restore(counts)
+                logging.getLogger(__name__).exception("hot counter flush failed")
+            finally:
+                close_old_connections()
+
+class RedisBuffer:
+    """所有进程共享的 Redis 哈希（字段 "<id>:<kind>"）；由 refresh_hot_rankings 统一刷写。"""
+    def incr(self,article_id,kind,n=1):
+        self._redis().hincrby(BUFFER_KEY,f"{int(article_id)}:{kind}",n)
+
+    def drain(self):
+        from redis.exceptions import ResponseError
+        r=self._redis(); tmp=f"{BUFFER_KEY}:{uuid.uuid4().hex}"
+        # RENAME 是原子的：之后的 HINCRBY 会落到新哈希里，不会丢计数
+        try: r.rename(BUFFER_KEY,tmp)
+        except ResponseError: return Counter()  # 缓冲为空
+        raw=r.hgetall(tmp); r.delete(tmp)
+        counts=Counter()
+        for field,n in raw.items():
+            article_id,_,kind=field.decode().partition(":")
+            counts[(int(article_id),kind)]+=int(n)
+        return counts
+
+    def _redis(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+
+_buffer=None
+
+def get_buffer():
+    global _buffer
+    if _buffer is None: _buffer=RedisBuffer() if settings.REDIS_URL else LocalBuffer()
+    return _buffer
+
+def record(article_id,kind="view",n=1):
+    if settings.HOT_ENABLED and kind in settings.HOT_WEIGHTS: get_buffer().incr(article_id,kind,n)
+
+def apply_counts(counts,ts=None):
+    """counts: {(article_id, kind): n}；把一批计数并入 ArticleStats，返回更新的文章数。"""
+    from .models import ArticlePage, ArticleStats
+    if not counts: return 0
+    ts=ts or time.time()
+    per_article={}
+    for (article_id,kind),n in counts.items():
+        if n>0 and kind in settings.HOT_WEIGHTS: per_article.setdefault(article_id,Counter())[kind]+=n
+    with transaction.atomic():
+        # 信标接口可能带来不存在的 ID，只保留真实文章
+        ids=set(ArticlePage.objects.filter(id__in=per_article).values_list("id",flat=True))
+        existing={s.article_id:s for s in ArticleStats.objects.select_for_update().filter(article_id__in=ids)}
+        new=[]
+        for article_id in ids:
+            stats=existing.get(article_id)
+            if stats is None: stats=ArticleStats(article_id=article_id); new.append(stats)
+            for kind,n in per_article[article_id].items():
+                setattr(stats,f"{kind}s",getattr(stats,f"{kind}s")+n)
+                stats.log_score=log_add(stats.log_score,event_log_score(kind,n,ts))
+        if existing: ArticleStats.objects.bulk_update(existing.values(),["views","clicks","log_score"])
+        # 并发刷写同时新建同一行时后写者让步（只丢失这一批对这篇文章的计数）
+        if new: ArticleStats.objects.bulk_create(new,ignore_conflicts=True)
+    return len(ids)
+
+def flush(buffer=None):
+    return apply_counts((buffer or get_buffer()).drain())
+
+# ---- 排行 ----
+
+def ranking_scope(site_id,channel_slug=None):
+    return f"site:{site_id}:ch:{channel_slug}" if channel_slug else f"site:{site_id}"
+
+def _items(qs):
+    return [[i,bool(img),d.timestamp() if d else 0] for i,img,d in qs.values_list("id","hero_image_id","date")]
+
+def rebuild_rankings(now=None):
+    """重算全部排行，返回内容发生变化的 scope 列表。"""
+    from core.sites import registry
+    from .models import ArticlePage, Channel, HotRanking
+    k=settings.HOT_TOP_K
+    floor=score_floor(now)
+    channels=list(Channel.objects.filter(is_active=True))
+    rows={}
+    for site in registry.sites():
+        base=ArticlePage.objects.listed(site).filter(stats__log_score__gte=floor).order_by("-stats__log_score","-id")
+        rows[ranking_scope(site.id)]=_items(base[:k])
+        for ch in channels:
+            rows[ranking_scope(site.id,ch.slug)]=_items(base.filter(channels=ch)[:k])
+    existing={r.scope:r for r in HotRanking.objects.all()}
+    changed=[s for s,items in rows.items() if s not in existing or existing[s].items!=items]
+    stale=[s for s in existing if s not in rows]
+    with transaction.atomic():
+        for s in changed:
+            HotRanking.objects.update_or_create(scope=s,defaults={"items":rows[s]})
+        if stale: HotRanking.objects.filter(scope__in=stale).delete()
+    return changed+stale
+
+def hot_items(scope):
+    """[[id, 有图, 发布时间戳], ...]，按热度降序；进程外缓存，排行重算后失效。"""
+    from core.cache import content_version, swr_get
+    from .models import HotRanking
+    def build():
+        return HotRanking.objects.filter(scope=scope).values_list("items",flat=True).first() or []
+    return swr_get(f"hot:ranking:{scope}",build,settings.HOT_RANKING_TTL,content_version(RANKING_SCOPE))
+
+def refresh():
+    """刷写缓冲并重算排行；精选用热度补齐的站点排行变化时让首页快照失效。返回 (更新的文章数, 变化的 scope)。"""
+    from core.cache import bump_content_version
+    from core.pagecache import purge_tags
+    from core.sites import registry
+    from core.snapshot import invalidate_home_snapshot, site_scope
+    updated=flush()
+    changed=rebuild_rankings()
+    if changed:
+        bump_content_version(RANKING_SCOPE)
+        for site in registry.sites():
+            toggles=registry.toggles(site)
+            if toggles and toggles.featured_use_hot and ranking_scope(site.id) in changed:
+                invalidate_home_snapshot(site)
+                bump_content_version(site_scope(site.id))
+                purge_tags(f"site:{site.id}")
+    return updated,changed
@@ -0,0 +1,178 @@
+import json, time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from django.conf import settings
+from django.utils.encoding import iri_to_uri
+import requests
+from requests.adapters import HTTPAdapter
+
+# OpenSearch 批量索引：keyset 分页流式读取文章，拼装 NDJSON 交给线程池通过连接池发送 _bulk。
+
+RETRY_STATUSES=(429,503)
+DOC_FIELDS=("id","title","date","hero_image_id","url_path")
+TOMBSTONE_ACTIONS=("wagtail.unpublish","wagtail.unpublish.scheduled","wagtail.delete")
+INDEX_BODY={
+    "settings":{"index":{"refresh_interval":"-1"}},
+    "mappings":{"dynamic":"strict","properties":{
+        "id":{"type":"long"},"site_id":{"type":"integer"},"site_hostname":{"type":"keyword"},
+        "title":{"type":"text"},"date":{"type":"date"},"channels":{"type":"keyword"},
+        "has_image":{"type":"boolean"},"absolute_url":{"type":"keyword","index":False}}},
+}
+LIVE_SETTINGS={"index":{"refresh_interval":"1s"}}
+# 原地写入别名本身（非 --versioned、增量同步也写它）时直接按在线设置建索引，构建中途失败也不会留下不刷新的索引
+LIVE_INDEX_BODY={**INDEX_BODY,"settings":LIVE_SETTINGS}
+
+def site_url_prefix(site):
+    """(root_url, 根页面 url_path 长度)：按 url_path 直接拼出完整 URL，省去每篇文章的站点查找。"""
+    return site.root_url,len(site.root_page.url_path)
+
+def article_url(prefix,url_path):
+    root_url,cut=prefix
+    return root_url+iri_to_uri("/"+url_path[cut:])
+
+def article_doc(a,site,prefix):
+    return {"id":a.id,"site_id":site.id,"site_hostname":site.hostname,"title":a.title,
+            "date":a.date.isoformat() if a.date else None,"channels":[c.slug for c in a.channels.all()],
+            "has_image":bool(a.hero_image_id),"absolute_url":article_url(prefix,a.url_path)}
+
+def iter_site_articles(site,chunk_size=1000,qs=None):
+    """按 id 做 keyset 分页，每页一次查询 + 一次频道预取。"""
+    from news.models import ArticlePage
+    base=(qs if qs is not None else ArticlePage.objects.listed()).descendant_of(site.root_page)
+    base=base.order_by("id").only(*DOC_FIELDS).prefetch_related("channels")
+    last=0
+    while True:
+        chunk=list(base.filter(id__gt=last)[:chunk_size])
+        if not chunk: return
+        yield chunk
+        last=chunk[-1].id
+
+def site_for_path(sites,path):
+    """页面所属站点：根路径是页面 path 前缀的站点中最深的那个。"""
+    best=None
+    for site in sites:
+        root=site.root_page.path
+        if path.startswith(root) and (best is None or len(root)>len(best.root_page.path)): best=site
+    return best
+
+def page_ops(index,ids):
+    """按页面 ID 生成 _bulk 操作：在线且公开的页面写入，其余删除。"""
+    from wagtail.models import Site
+    from news.models import ArticlePage
+    sites=list(Site.objects.select_related("root_page")); prefixes={s.id:site_url_prefix(s) for s in sites}
+    live={a.id:a for a in ArticlePage.objects.listed().filter(id__in=ids).only(*DOC_FIELDS,"path").prefetch_related("channels")}
+    ops=[]
+    for i in ids:
+        a=live.get(i); site=site_for_path(sites,a.path) if a else None
+        ops.append(index_op(index,article_doc(a,site,prefixes[site.id])) if site else delete_op(index,i))
+    return ops
+
+def tombstone_ids(since):
+    """since 之后被撤回或删除、且当前不在线的文章 ID（取自 Wagtail 操作日志）。"""
+    from django.contrib.contenttypes.models import ContentType
+    from wagtail.models import PageLogEntry
+    from news.models import ArticlePage
+    ids=set(PageLogEntry.objects.filter(action__in=TOMBSTONE_ACTIONS,timestamp__gte=since,
+        content_type=ContentType.objects.get_for_model(ArticlePage)).values_list("page_id",flat=True))
+    if ids: ids-=set(ArticlePage.objects.listed().filter(id__in=ids).values_list("id",flat=True))
+    return ids
+
+def index_op(index,doc):
+    return (json.dumps({"index":{"_index":index,"_id":doc["id"]}}),json.dumps(doc,ensure_ascii=False))
+
+def delete_op(index,doc_id):
+    return (json.dumps({"delete":{"_index":index,"_id":doc_id}}),)
+
+def batched(iterable,size):
+    it=iter(iterable)
+    while True:
+        batch=list(islice(it,size))
+        if not batch: return
+        yield batch
+
+class BulkClient:
+    def __init__(self,base=None,workers=4,max_retries=5,timeout=30,backoff=0.5):
+        self.base=(base or settings.OS_URL).rstrip("/")
+        self.workers=workers; self.max_retries=max_retries; self.timeout=timeout; self.backoff=backoff
+        self.session=requests.Session()
+        adapter=HTTPAdapter(pool_connections=1,pool_maxsize=max(workers,1))
+        self.session.mount("http://",adapter); self.session.mount("https://",adapter)
+
+    def ensure_index(self,index,body=None):
+        r=self.session.put(f"{self.base}/{index}",json=body,timeout=self.timeout)
+        return r.status_code in (200,201) or "resource_already_exists" in r.text
+
+    def versioned_indices(self,alias):
+        r=self.session.get(f"{self.base}/{alias}_v*",timeout=self.timeout)
+        return sorted(r.json() if r.status_code==200 else {})
+
+    def alias_targets(self,alias):
+        r=self.session.get(f"{self.base}/_alias/{alias}",timeout=self.timeout)
+        return sorted(r.json()) if r.status_code==200 else []
+
+    def next_version(self,alias):
+        versions=[int(n.rsplit("_v",1)[1]) for n in self.versioned_indices(alias) if n.rsplit("_v",1)[1].isdigit()]
+        return f"{alias}_v{max(versions,default=0)+1}"
+
+    def finalize(self,index):
+        """构建完成：恢复刷新间隔，并立即 refresh 让文档可见。"""
+        self.session.put(f"{self.base}/{index}/_settings",json=LIVE_SETTINGS,timeout=self.timeout).raise_for_status()
+        self.session.post(f"{self.base}/{index}/_refresh",timeout=self.timeout).raise_for_status()
+
+    def swap_alias(self,alias,index):
+        """原子切换别名；若存在与别名同名的旧实体索引，在同一请求中删除。返回被替换的旧索引。"""
+        old=[i for i in self.alias_targets(alias) if i!=index]
+        actions=[{"remove":{"index":i,"alias":alias}} for i in old]
+        if not old and self.session.head(f"{self.base}/{alias}",timeout=self.timeout).status_code==200:
+            actions.append({"remove_index":{"index":alias}})
+        actions.append({"add":{"index":index,"alias":alias}})
+        self.session.post(f"{self.base}/_aliases",json={"actions":actions},timeout=self.timeout).raise_for_status()
+        return old
+
+    def delete_index(self,index):
+        self.session.delete(f"{self.base}/{index}",timeout=self.timeout)
+
+    def send(self,ops):
+        """发送一批操作，对 429/503（整体或单条）指数退避重试；返回 (成功数, 错误列表)。"""
+        pending=list(ops); ok=0; errors=[]; attempt=0
+        while pending:
+            body="\n".join(line for op in pending for line in op)+"\n"
+            try:
+                r=self.session.post(f"{self.base}/_bulk",data=body.encode("utf-8"),
+                                    headers={"Content-Type":"application/x-ndjson"},timeout=self.timeout)
+            except requests.RequestException as e:
+                r=None; err=str(e)
+            if r is None or r.status_code in RETRY_STATUSES:
+                if attempt>=self.max_retries:
+                    errors.append(err if r is None else f"HTTP {r.status_code}: {r.text[:120]}"); break
+                attempt+=1; time.sleep(self.backoff*2**(attempt-1)); continue
+            if r.status_code!=200:
+                errors.append(f"HTTP {r.status_code}: {r.text[:120]}"); break
+            retry=[]
+            for op,item in zip(pending,r.json().get("items",[])):
+                action,res=next(iter(item.items()))
+                status=res.get("status",500)
+                if status<300 or (action=="delete" and status==404): ok+=1
+                elif status in RETRY_STATUSES and attempt<self.max_retries: retry.append(op)
+                else: errors.append(f"{res.get('_id')}: {str(res.get('error'))[:120]}")
+            pending=retry
+            if retry:
+                attempt+=1; time.sleep(self.backoff*2**(attempt-1))
+        return ok,errors
+
+    def run(self,ops,bulk_size=500,on_result=None):
+        """把操作流切成 _bulk 批次并发发送，在途批次数有上限，内存占用与总量无关。"""
+        ok=0; errors=[]
+        def collect(done):
+            nonlocal ok
+            for f in done:
+                n,errs=f.result(); ok+=n; errors.extend(errs)
+                if on_result: on_result(n,errs)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            inflight=set()
+            for batch in batched(ops,bulk_size):
+                inflight.add(pool.submit(self.send,batch))
+                if len(inflight)>=self.workers*2:
+                    done,inflight=wait(inflight,return_when=FIRST_COMPLETED); collect(done)
+            collect(wait(inflight)[0])
+        return ok,errors
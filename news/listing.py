@@ -0,0 +1,115 @@
+from collections import defaultdict
+from django.db import transaction
+from .models import ArticleListing, ArticlePage
+
+# 列表读模型（ArticleListing）的同步：按文章当前状态整体重写它的行——在线且公开的文章在根页面包含它的每个站点写一行
+# channel 为空的站点行和每个频道一行，否则删光。Wagtail 的发布/撤回/移动信号与批量写入路径（news.bulk、通讯社导入）调用 sync，
+# 页面删除由外键级联。访问限制（PageViewRestriction）增删时重写受限页面下的文章，站点根页面变化时在后台全量重建；
+# 新部署或怀疑不一致时用 manage.py rebuild_listing 全量重建。
+
+CHUNK=1000
+FIELDS=("id","path","url_path","title","date","hero_image_id","is_featured","feature_rank")
+
+def listing(site=None,channel=None):
+    """站点（None 为全部站点）的站点行或某频道的行；channel 为 Channel 或其 ID。"""
+    qs=ArticleListing.objects.all()
+    if site is not None: qs=qs.filter(site_id=site.id)
+    return qs.filter(channel=channel) if channel is not None else qs.filter(channel__isnull=True)
+
+def order_fields(ordering,key="article_id"):
+    """排序字段（- 前缀为降序），最后以文章 ID 降序决胜。key 为 ID 所在的列：列表表上是 article_id，
+    文章表与内存中的候选行（core.home）上是 id；首页组装与列表查询共用这一份，排序不会分叉。"""
+    return [o for o in ordering.split(",") if o]+[f"-{key}"]
+
+def hydrate(rows,*renditions):
+    """按列表行的顺序实例化文章（卡片所需的频道与题图渲染一并预取）。"""
+    ids=[r.article_id for r in rows]
+    found={a.id:a for a in ArticlePage.objects.filter(id__in=ids).for_cards(*renditions)} if ids else {}
+    return [found[i] for i in ids if i in found]
+
+def _rows(articles,sites):
+    through=ArticlePage.channels.through
+    chs=defaultdict(list)
+    for a,c in through.objects.filter(articlepage_id__in=[a.id for a in articles]).values_list("articlepage_id","channel_id"):
+        chs[a].append(c)
+    for a in articles:
+        for s in sites:
+            if not a.path.startswith(s.root_page.path): continue
+            for c in [None,*chs[a.id]]:
+                yield ArticleListing(article_id=a.id,site_id=s.id,channel_id=c,title=a.title,url_path=a.url_path,date=a.date,
+                                     hero_image_id=a.hero_image_id,has_image=a.hero_image_id is not None,
+                                     is_featured=a.is_featured,feature_rank=a.feature_rank)
+
+def sync(article_ids):
+    """重写这些文章的列表行，返回写入的行数。"""
+    from core.sites import registry
+    ids=list(dict.fromkeys(article_ids)); n=0
+    sites=registry.sites()
+    for i in range(0,len(ids),CHUNK):
+        chunk=ids[i:i+CHUNK]
+        live=list(ArticlePage.objects.listed().filter(id__in=chunk).only(*FIELDS))
+        rows=list(_rows(live,sites))
+        with transaction.atomic():
+            ArticleListing.objects.filter(article_id__in=chunk).delete()
+            ArticleListing.objects.bulk_create(rows,batch_size=CHUNK)
+        n+=len(rows)
+    return n
+
+def rebuild(site=None):
+    """全量重建（或只重建某站点根页面下的文章），按文章 ID keyset 分批；逐批替换，重建期间列表不会变空。"""
+    qs=ArticlePage.objects.descendant_of(site.root_page) if site else ArticlePage.objects.all()
+    last=0; n=0
+    while True:
+        ids=list(qs.filter(id__gt=last).order_by("id").values_list("id",flat=True)[:CHUNK])
+        if not ids: return n
+        n+=sync(ids); last=ids[-1]
+
+# 信号在发布事务内同步写入：随后的 after_publish_page 钩子（首页快照增量重算等）读到的已是新行
+
+def _published(sender,instance,**kwargs):
+    sync([instance.id])
+
+def _moved(sender,instance,**kwargs):
+    # 移动整棵子树：url_path 与所属站点都可能变化
+    sync(ArticlePage.objects.descendant_of(instance,inclusive=True).values_list("id",flat=True))
+
+def invalidate_reads():
+    """列表行被批量改写后，让各站点首页快照、接口缓存与整页缓存失效。"""
+    from core.cache import bump_content_version
+    from core.pagecache import purge_tags
+    from core.snapshot import PORTAL_SCOPE, invalidate_home_snapshot, site_scope
+    from core.sites import registry
+    from .models import Channel
+    sites=registry.sites()
+    for s in sites: invalidate_home_snapshot(s)
+    bump_content_version(*[site_scope(s.id) for s in sites],PORTAL_SCOPE)
+    purge_tags(*[f"site:{s.id}" for s in sites],*[f"channel:{c}" for c in Channel.objects.values_list("slug",flat=True)])
+
+def _restriction_changed(sender,instance,**kwargs):
+    # 受限页面本身及其下的文章：listed() 的 public() 条件随之变化
+    from wagtail.models import Page
+    page=Page.objects.filter(id=instance.page_id).only("path","depth").first()
+    if page is None: return
+    sync(ArticlePage.objects.descendant_of(page,inclusive=True).values_list("id",flat=True))
+    invalidate_reads()
+
+def _site_changed(sender,instance,**kwargs):
+    # 根页面可能变化：文章所属站点整体重算，放到后台任务
+    from .tasks import rebuild_article_listing
+    transaction.on_commit(lambda:rebuild_article_listing.enqueue())
+
+def _image_deleted(sender,instance,**kwargs):
+    ArticleListing.objects.filter(hero_image_id=instance.pk).update(hero_image_id=None,has_image=False)
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+    from wagtail.images import get_image_model
+    from wagtail.models import PageViewRestriction, Site
+    from wagtail.signals import page_published, page_unpublished, post_page_move
+    page_published.connect(_published,sender=ArticlePage,dispatch_uid="article-listing-published")
+    page_unpublished.connect(_published,sender=ArticlePage,dispatch_uid="article-listing-unpublished")
+    post_page_move.connect(_moved,dispatch_uid="article-listing-moved")
+    for signal,name in ((post_save,"save"),(post_delete,"delete")):
+        signal.connect(_restriction_changed,sender=PageViewRestriction,dispatch_uid=f"article-listing-restriction-{name}")
+        signal.connect(_site_changed,sender=Site,dispatch_uid=f"article-listing-site-{name}")
+    post_delete.connect(_image_deleted,sender=get_image_model(),dispatch_uid="article-listing-image-deleted")
@@ -0,0 +1,92 @@
+import random, time, uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from wagtail.images import get_image_model
+from news.bulk import bulk_create_articles
+from news.models import ArticlePage, Channel, SectionIndexPage
+
+# 压测数据：按站点批量生成 10 万～100 万篇已发布文章（频道 1~3 个、部分带题图、少量精选、发布时间在 --days 天内随机分布），
+# 走 news.bulk 的批量树插入，不生成修订记录。生成后站点首页快照与接口缓存随内容版本失效；搜索索引需另行 reindex_opensearch。
+
+PARAGRAPHS=["据了解，相关部门已着手研究具体实施方案。","业内人士表示，这一变化将对行业格局产生深远影响。",
+            "记者在现场看到，工作人员正在有序开展各项工作。","专家建议，公众应理性看待，关注后续权威发布。"]
+
+class Command(BaseCommand):
+    help="Bulk-generate published ArticlePages for load testing (bulk tree inserts, no revisions)"
+
+    def add_arguments(self,parser):
+        parser.add_argument("--count",type=int,default=100000,help="Articles per site (default: 100000)")
+        parser.add_argument("--site",action="append",help="Only these hostnames (repeatable; default: all sites)")
+        parser.add_argument("--batch-size",type=int,default=2000,help="Articles per transaction (default: 2000)")
+        parser.add_argument("--days",type=int,default=365,help="Spread publication dates over this many days (default: 365)")
+        parser.add_argument("--image-ratio",type=float,default=0.6,help="Share of articles with a hero image (default: 0.6)")
+        parser.add_argument("--featured-ratio",type=float,default=0.02,help="Share of featured articles (default: 0.02)")
+        parser.add_argument("--seed",type=int,help="Random seed for repeatable datasets")
+
+    def handle(self,*args,**options):
+        from core.cache import bump_content_version
+        from core.pagecache import purge_tags
+        from core.sites import registry
+        from core.snapshot import PORTAL_SCOPE, invalidate_home_snapshot, site_scope
+        from news.sitemaps import invalidate as invalidate_sitemaps
+        if options["count"]<1: raise CommandError("--count must be at least 1")
+        if options["batch_size"]<1: raise CommandError("--batch-size must be at least 1")
+        if options["days"]<1: raise CommandError("--days must be at least 1")
+        for name in ("image_ratio","featured_ratio"):
+            if not 0<=options[name]<=1: raise CommandError(f"--{name.replace('_','-')} must be between 0 and 1")
+        rnd=random.Random(options["seed"])
+        channels=list(Channel.objects.filter(is_active=True).values_list("id","name"))
+        if not channels: raise CommandError("No active channels; run seed_demo first")
+        images=list(get_image_model().objects.values_list("id",flat=True))
+        if options["image_ratio"]>0 and not images:
+            self.stdout.write(self.style.WARNING("No images in the library: generating articles without hero images"))
+        sites=list({s.hostname:s for s in registry.sites()}.values())
+        if options["site"]:
+            sites=[s for s in sites if s.hostname in options["site"]]
+            if not sites: raise CommandError(f"Unknown site: {', '.join(options['site'])}")
+        prefix=f"gen-{uuid.uuid4().hex[:6]}"
+        total_start=time.monotonic(); total=0
+        for site in sites:
+            parent=self.section(site)
+            start=time.monotonic(); done=0; ids=[]
+            while done<options["count"]:
+                n=min(options["batch_size"],options["count"]-done)
+                articles,channel_ids=self.batch(rnd,site,prefix,done,n,channels,images,options)
+                ids+=[a.pk for a in bulk_create_articles(parent,articles,channel_ids)]
+                done+=n
+                elapsed=time.monotonic()-start
+                self.stdout.write(f"  {site.hostname}: {done}/{options['count']} ({done/elapsed:.0f} articles/s)",ending="\r")
+            self.stdout.write("")
+            invalidate_home_snapshot(site); bump_content_version(site_scope(site.id)); purge_tags(f"site:{site.id}")
+            invalidate_sitemaps(site.id,ids)
+            total+=done
+        bump_content_version(PORTAL_SCOPE)
+        elapsed=max(time.monotonic()-total_start,1e-6)
+        self.stdout.write(self.style.SUCCESS(f"Generated {total} articles on {len(sites)} sites in {elapsed:.1f}s "
+                                             f"({total/elapsed:.0f} articles/s); run reindex_opensearch if search is enabled"))
+
+    def section(self,site):
+        root=site.root_page.specific
+        sec=root.get_children().type(SectionIndexPage).first()
+        if sec is None:
+            sec=SectionIndexPage(title="新闻中心")
+            root.add_child(instance=sec)
+            sec.save_revision().publish()
+        return sec
+
+    def batch(self,rnd,site,prefix,offset,n,channels,images,options):
+        now=timezone.now(); span=options["days"]*86400
+        articles=[]; channel_ids=[]
+        for i in range(offset,offset+n):
+            chs=rnd.sample(channels,k=min(rnd.choice((1,2,3)),len(channels)))
+            date=now-timedelta(seconds=rnd.randrange(span))
+            featured=rnd.random()<options["featured_ratio"]
+            body=[{"type":"paragraph","value":rnd.choice(PARAGRAPHS),"id":str(uuid.uuid4())} for _ in range(rnd.randint(2,6))]
+            articles.append(ArticlePage(
+                title=f"{chs[0][1]}：{site.site_name or site.hostname}第{i+1}号报道",slug=f"{prefix}-{i+1}",
+                date=date,first_published_at=date,last_published_at=date,
+                hero_image_id=rnd.choice(images) if images and rnd.random()<options["image_ratio"] else None,
+                body=body,is_featured=featured,feature_rank=rnd.randint(1,100) if featured else 0))
+            channel_ids.append([c for c,_ in chs])
+        return articles,channel_ids
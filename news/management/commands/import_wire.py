@@ -0,0 +1,52 @@
+import sys, time
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Page
+from core.sites import registry
+from news.models import SectionIndexPage
+from news.wire import Importer, WireError, read_records
+
+class Command(BaseCommand):
+    help="Import wire stories from NDJSON or RSS/Atom files (upsert by external id, bulk tree inserts, batched publish)"
+
+    def add_arguments(self,parser):
+        parser.add_argument("files",nargs="+",help="Files to import ('-' reads stdin)")
+        parser.add_argument("--site",help="Target site hostname (default: the default site)")
+        parser.add_argument("--section",help="Target SectionIndexPage id or slug (default: the site's first section)")
+        parser.add_argument("--format",choices=("auto","ndjson","feed"),default="auto",help="Input format (default: sniff)")
+        parser.add_argument("--channel",help="Channel slug for stories without a matching channel/category")
+        parser.add_argument("--batch-size",type=int,default=500,help="Stories per transaction (default: 500)")
+
+    def target(self,options):
+        site=registry.for_hostname(options["site"]) if options["site"] else registry.default()
+        if site is None: raise CommandError(f"Unknown site: {options['site']}")
+        sections=SectionIndexPage.objects.descendant_of(site.root_page)
+        if options["section"]:
+            key=options["section"]
+            sections=sections.filter(id=int(key)) if key.isdigit() else sections.filter(slug=key)
+        section=sections.order_by("path").first()
+        if section is None: raise CommandError(f"No SectionIndexPage found on {site.hostname}")
+        return site,Page.objects.get(pk=section.pk)
+
+    def handle(self,*args,**options):
+        site,section=self.target(options)
+        try: importer=Importer(section,options["channel"])
+        except WireError as e: raise CommandError(str(e))
+        start=time.monotonic()
+        def progress(stats):
+            done=stats["created"]+stats["updated"]+stats["unchanged"]
+            self.stdout.write(f"  {done} stories ({done/max(time.monotonic()-start,1e-6):.0f}/s) {stats}",ending="\r")
+        for path in options["files"]:
+            stream=sys.stdin.buffer if path=="-" else open(path,"rb")
+            try:
+                importer.run(read_records(stream,options["format"]),options["batch_size"],progress)
+            except (ValueError,SyntaxError) as e:
+                raise CommandError(f"{path}: {e}")
+            finally:
+                if stream is not sys.stdin.buffer: stream.close()
+        self.stdout.write("")
+        importer.finish(site)
+        stats=importer.stats; elapsed=max(time.monotonic()-start,1e-6)
+        done=stats["created"]+stats["updated"]+stats["unchanged"]
+        self.stdout.write(self.style.SUCCESS(f"{site.hostname} / {section.title}: {done} stories in {elapsed:.1f}s "
+                                             f"({done/elapsed:.0f}/s) created={stats['created']} updated={stats['updated']} "
+                                             f"unchanged={stats['unchanged']} conflicts={stats['conflicts']} invalid={stats['invalid']}"))
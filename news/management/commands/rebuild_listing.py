@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from news.listing import rebuild
+
+class Command(BaseCommand):
+    help="Rebuild the denormalized ArticleListing rows (all sites, or one site's articles) from the page tree"
+
+    def add_arguments(self,parser):
+        parser.add_argument("--site",help="Only rebuild articles under this site's root (hostname)")
+
+    def handle(self,*args,**options):
+        from core.cache import bump_content_version
+        from core.snapshot import PORTAL_SCOPE, invalidate_home_snapshot, site_scope
+        from core.sites import registry
+        site=None
+        if options["site"]:
+            site=registry.for_hostname(options["site"])
+            if site is None: raise CommandError(f"Unknown site: {options['site']}")
+        start=time.monotonic()
+        n=rebuild(site)
+        for s in [site] if site else registry.sites():
+            invalidate_home_snapshot(s); bump_content_version(site_scope(s.id))
+        bump_content_version(PORTAL_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f"listing: {n} rows written in {time.monotonic()-start:.1f}s"))
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from news.hot import refresh
+
+class Command(BaseCommand):
+    help="Flush buffered view/click counters into ArticleStats and rebuild the per-site/per-channel hot rankings"
+
+    def add_arguments(self,parser):
+        parser.add_argument("--every",type=float,default=0,help="Keep running, refreshing every N seconds (default: run once)")
+
+    def handle(self,*args,**options):
+        while True:
+            start=time.monotonic()
+            updated,changed=refresh()
+            self.stdout.write(self.style.SUCCESS(f"hot: {updated} articles updated, {len(changed)} rankings changed "
+                                                 f"in {time.monotonic()-start:.2f}s"))
+            if not options["every"]: return
+            close_old_connections()
+            time.sleep(options["every"])
@@ -1,30 +1,80 @@
-from django.core.management.base import BaseCommand
+import re, time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from wagtail.models import Site
 from news.models import ArticlePage
-import requests
+from news.indexing import (INDEX_BODY, LIVE_INDEX_BODY, BulkClient, article_doc, delete_op, index_op, iter_site_articles,
+                           site_url_prefix, tombstone_ids)
 
 class Command(BaseCommand):
     help="Reindex ArticlePage into OpenSearch (optional). Controlled by OS_ENABLED env var."
 
+    def add_arguments(self,parser):
+        parser.add_argument("--chunk-size",type=int,default=1000,help="Rows fetched per keyset page (default: 1000)")
+        parser.add_argument("--bulk-size",type=int,default=500,help="Documents per _bulk request (default: 500)")
+        parser.add_argument("--workers",type=int,default=4,help="Concurrent _bulk senders (default: 4)")
+        parser.add_argument("--max-retries",type=int,default=5,help="Retries on 429/503 per batch (default: 5)")
+        parser.add_argument("--versioned",action="store_true",
+                            help="Build a new OS_INDEX_v{N} index and atomically point the OS_INDEX alias at it")
+        parser.add_argument("--prune",action="store_true",help="With --versioned, delete the indices the alias pointed to before")
+        parser.add_argument("--since",help="Delta mode: only pages published since an ISO datetime or a duration like 30m/6h/1d; "
+                                           "pages unpublished or deleted since then are removed")
+
+    def parse_since(self,value):
+        m=re.fullmatch(r"(\d+)([mhd])",value)
+        if m: return timezone.now()-timedelta(**{{"m":"minutes","h":"hours","d":"days"}[m.group(2)]:int(m.group(1))})
+        dt=parse_datetime(value)
+        if dt is None: raise CommandError(f"Invalid --since value: {value}")
+        return dt if timezone.is_aware(dt) else timezone.make_aware(dt)
+
     def handle(self,*args,**options):
         if not settings.OS_ENABLED:
             self.stdout.write(self.style.WARNING("OS_ENABLED=0 -> skipping")); return
-        index=settings.OS_INDEX; base=settings.OS_URL.rstrip("/")
-        try: requests.put(f"{base}/{index}")
-        except Exception as e: self.stdout.write(self.style.WARNING(f"Create index error: {e}"))
-        total=0
-        for site in Site.objects.all():
-            root=site.root_page
-            qs=ArticlePage.objects.live().public().specific().descendant_of(root)
-            for a in qs:
-                doc={"id":a.id,"site_id":site.id,"site_hostname":site.hostname,"title":a.title,
-                     "date":a.date.isoformat() if a.date else None,"channels":[c.slug for c in a.channels.all()],
-                     "has_image":bool(a.hero_image_id),"absolute_url":a.get_full_url()}
-                try:
-                    r=requests.post(f"{base}/{index}/_doc/{a.id}",json=doc)
-                    if r.status_code not in (200,201): self.stdout.write(self.style.WARNING(f"Index error {a.id}: {r.text[:120]}"))
-                except Exception as e:
-                    self.stdout.write(self.style.WARNING(f"Index exception {a.id}: {e}"))
-                total+=1
-        self.stdout.write(self.style.SUCCESS(f"Indexed {total} docs into {index}"))
+        alias=settings.OS_INDEX
+        client=BulkClient(workers=options["workers"],max_retries=options["max_retries"])
+        if options["since"] and options["versioned"]:
+            raise CommandError("--since updates the live index in place and cannot be combined with --versioned")
+        since=self.parse_since(options["since"]) if options["since"] else None
+        if since:
+            index=alias
+        elif options["versioned"]:
+            index=client.next_version(alias)
+            if not client.ensure_index(index,INDEX_BODY): raise CommandError(f"Could not create index {index}")
+        else:
+            index=alias
+            try: client.ensure_index(index,LIVE_INDEX_BODY)
+            except Exception as e: self.stdout.write(self.style.WARNING(f"Create index error: {e}"))
+        start=time.monotonic(); done=[0]
+
+        def ops():
+            qs=ArticlePage.objects.listed()
+            if since: qs=qs.filter(last_published_at__gte=since)
+            for site in Site.objects.select_related("root_page"):
+                prefix=site_url_prefix(site)
+                for chunk in iter_site_articles(site,options["chunk_size"],qs):
+                    for a in chunk: yield index_op(index,article_doc(a,site,prefix))
+            if since:
+                for doc_id in tombstone_ids(since): yield delete_op(index,doc_id)
+
+        def progress(n,errs):
+            done[0]+=n
+            for e in errs[:5]: self.stdout.write(self.style.WARNING(f"Index error {e}"))
+            self.stdout.write(f"  {done[0]} docs, {done[0]/max(time.monotonic()-start,1e-6):.0f} docs/s")
+
+        total,errors=client.run(ops(),options["bulk_size"],progress)
+        elapsed=max(time.monotonic()-start,1e-6)
+        if errors: self.stdout.write(self.style.WARNING(f"{len(errors)} docs failed"))
+        if not options["versioned"]:
+            # 原地写入：立即 refresh 让本次写入可见（此前按旧的 INDEX_BODY 建出的别名索引也借此恢复刷新间隔）
+            client.finalize(index)
+        else:
+            if errors: raise CommandError(f"{index} left unaliased because of failed docs; {alias} is unchanged")
+            client.finalize(index)
+            old=client.swap_alias(alias,index)
+            self.stdout.write(self.style.SUCCESS(f"Alias {alias} -> {index}"+(f" (was {', '.join(old)})" if old else "")))
+            if options["prune"]:
+                for name in old: client.delete_index(name)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} docs into {index} in {elapsed:.1f}s ({total/elapsed:.0f} docs/s)"))
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_id', models.IntegerField(unique=True)),
+                ('queued_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_articlestats_hotranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleEvents',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article_id', models.IntegerField()),
+                ('site_id', models.IntegerField(null=True)),
+                ('minute', models.DateTimeField(db_index=True)),
+                ('impressions', models.PositiveIntegerField(default=0)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['article_id', 'minute'], name='news_events_article_minute')],
+            },
+        ),
+    ]
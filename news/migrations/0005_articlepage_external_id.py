@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_articleevents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articlepage',
+            name='external_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='articlepage',
+            name='external_id',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_articlepage_external_id'),
+        ('wagtailcore', '0095_groupsitepermission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleListing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('url_path', models.TextField()),
+                ('date', models.DateTimeField()),
+                ('hero_image_id', models.IntegerField(null=True)),
+                ('has_image', models.BooleanField(default=False)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('feature_rank', models.IntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listings', to='news.articlepage')),
+                ('channel', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.channel')),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.site')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['site', 'channel', '-is_featured', '-feature_rank', '-date', '-article'], name='news_listing_featured'), models.Index(fields=['site', 'channel', '-date', '-article'], name='news_listing_date'), models.Index(condition=models.Q(('has_image', True)), fields=['site', 'channel', '-is_featured', '-feature_rank', '-date', '-article'], name='news_listing_featured_img'), models.Index(condition=models.Q(('has_image', True)), fields=['site', 'channel', '-date', '-article'], name='news_listing_date_img'), models.Index(fields=['channel', '-date', '-article'], name='news_listing_portal'), models.Index(condition=models.Q(('has_image', True)), fields=['channel', '-date', '-article'], name='news_listing_portal_img')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_articlelisting'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='articlelisting',
+            name='news_listing_featured_img',
+        ),
+        migrations.RemoveIndex(
+            model_name='articlelisting',
+            name='news_listing_date_img',
+        ),
+        migrations.AddIndex(
+            model_name='articlelisting',
+            index=models.Index(fields=['site', 'channel', 'has_image', '-is_featured', '-feature_rank', '-date', '-article'], name='news_listing_featured_img'),
+        ),
+        migrations.AddIndex(
+            model_name='articlelisting',
+            index=models.Index(fields=['site', 'channel', 'has_image', '-date', '-article'], name='news_listing_date_img'),
+        ),
+    ]
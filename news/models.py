@@ -1,5 +1,7 @@
 from django.db import models
-from wagtail.models import Page
+from django.db.models import Prefetch
+from wagtail.models import Page, PageManager
+from wagtail.query import PageQuerySet
 from wagtail.snippets.models import register_snippet
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.fields import StreamField
@@ -25,6 +27,7 @@ class ArticleBody(StreamBlock):
 
 class SectionIndexPage(Page):
     intro=models.TextField(blank=True)
+    template="news/sectionindex_page.html"
     parent_page_types=["core.HomePage"]
     subpage_types=["news.ArticlePage","news.SectionIndexPage"]
     content_panels=Page.content_panels+[FieldPanel("intro")]
@@ -36,6 +39,28 @@ class ArticleTag(TaggedItemBase):
         on_delete=models.CASCADE
     )
 
+# 卡片模板使用的渲染规格（连同各自的响应式阶梯），列表查询按需批量预取
+CARD_RENDITION="fill-400x225"
+FEATURED_RENDITION="fill-600x338"
+ARTICLE_RENDITION="fill-800x450"
+# 发布时后台预生成：题图的全部规格，正文图片按 ImageChooserBlock 默认的 original 渲染
+HERO_RENDITIONS=(FEATURED_RENDITION,CARD_RENDITION,ARTICLE_RENDITION)
+BODY_RENDITIONS=("original",)
+
+class ArticlePageQuerySet(PageQuerySet):
+    """文章列表查询：直接查 ArticlePage 表（无需 .specific() 二次回表），并批量预取频道与题图渲染。"""
+    def listed(self,site=None):
+        qs=self.live().public()
+        return qs.descendant_of(site.root_page) if site else qs
+    def for_cards(self,*renditions):
+        from wagtail.images import get_image_model
+        from .renditions import rendition_set
+        images=get_image_model().objects.all()
+        if renditions: images=images.prefetch_renditions(*[s for r in renditions for s in rendition_set(r)])
+        return self.prefetch_related("channels",Prefetch("hero_image",queryset=images))
+
+ArticlePageManager=PageManager.from_queryset(ArticlePageQuerySet)
+
 class ArticlePage(Page):
     date=models.DateTimeField(db_index=True)
     hero_image=models.ForeignKey("wagtailimages.Image",null=True,blank=True,on_delete=models.SET_NULL,related_name="+")
@@ -44,6 +69,10 @@ class ArticlePage(Page):
     tags=ClusterTaggableManager(through="news.ArticleTag",blank=True)
     is_featured=models.BooleanField(default=False,db_index=True)
     feature_rank=models.IntegerField(default=0,db_index=True)
+    # 通讯社稿件导入：来源稿件 ID（如 xinhua:20250101-0001）与内容摘要，重复导入按摘要判断是否需要更新
+    external_id=models.CharField(max_length=255,null=True,blank=True,unique=True,editable=False)
+    external_hash=models.CharField(max_length=32,blank=True,editable=False)
+    objects=ArticlePageManager()
     parent_page_types=["news.SectionIndexPage"]
     subpage_types=[]
     content_panels=Page.content_panels+[FieldPanel("date"),FieldPanel("hero_image"),FieldPanel("body"),
@@ -59,17 +88,76 @@ class ChannelsIndexPage(RoutablePageMixin, Page):
         channels=Channel.objects.filter(is_active=True).order_by("name")
         return render(request,"news/channels_index.html",{"page":self,"channels":channels})
     
-    @route(r'^(?P<slug>[-\\w]+)/$')
+    @route(r'^(?P<slug>[-\w]+)/$')
     def by_channel(self, request, slug):
-        from django.core.paginator import Paginator
         from django.shortcuts import render, get_object_or_404
-        site_root=request.site.root_page
+        from wagtail.models import Site
+        from core.pagecache import add_cache_tags
+        from .listing import hydrate, listing
+        from .pagination import keyset_page
+        site=Site.find_for_request(request)
         ch=get_object_or_404(Channel,slug=slug,is_active=True)
-        qs=ArticlePage.objects.live().public().specific().descendant_of(site_root).filter(channels=ch).order_by("-date")
-        paginator=Paginator(qs,10)
-        page_num=int(request.GET.get("page",1))
-        page_obj=paginator.get_page(page_num)
-        return render(request,"news/channel_landing.html",{"page":self,"channel":ch,"page_obj":page_obj,"items":page_obj.object_list})
+        add_cache_tags(request,f"channel:{ch.slug}")
+        rows,next_cursor,prev_cursor=keyset_page(listing(site,ch),10,after=request.GET.get("after"),
+                                                 before=request.GET.get("before"),key="article_id")
+        items=hydrate(rows,CARD_RENDITION)
+        return render(request,"news/channel_landing.html",{"page":self,"channel":ch,"items":items,
+                                                          "next_cursor":next_cursor,"prev_cursor":prev_cursor})
+
+class SearchIndexQueue(models.Model):
+    """待同步到 OpenSearch 的页面：每个页面只保留一行，出队时按页面当前状态决定写入或删除。"""
+    page_id=models.IntegerField(unique=True)
+    queued_at=models.DateTimeField(auto_now=True,db_index=True)
+
+class ArticleStats(models.Model):
+    """文章互动计数与时间衰减热度。log_score=ln(Σ 权重·e^(λ·(t-T0)))：排序与当前时间无关，可直接建索引。"""
+    article=models.OneToOneField(ArticlePage,primary_key=True,on_delete=models.CASCADE,related_name="stats")
+    views=models.BigIntegerField(default=0)
+    clicks=models.BigIntegerField(default=0)
+    log_score=models.FloatField(null=True,db_index=True)
+    updated_at=models.DateTimeField(auto_now=True)
+
+class HotRanking(models.Model):
+    """热度排行快照：scope 为 site:ID 或 site:ID:ch:slug，items 为按热度降序的 [id, 有图, 发布时间戳]。"""
+    scope=models.CharField(max_length=120,unique=True)
+    items=models.JSONField(default=list)
+    computed_at=models.DateTimeField(auto_now=True)
+
+class ArticleEvents(models.Model):
+    """按 (文章, 站点, 分钟) 预聚合的曝光/浏览/点击，只追加；同一分钟可能有多行，统计时求和。不设外键，写入只是批量 INSERT。"""
+    article_id=models.IntegerField()
+    site_id=models.IntegerField(null=True)
+    minute=models.DateTimeField(db_index=True)
+    impressions=models.PositiveIntegerField(default=0)
+    views=models.PositiveIntegerField(default=0)
+    clicks=models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes=[models.Index(fields=["article_id","minute"],name="news_events_article_minute")]
 
+class ArticleListing(models.Model):
+    """列表读模型：每篇在线且公开的文章在其所属的每个站点一行 channel 为空的站点行，外加每个频道一行；
+    由 news.listing 在发布/撤回/移动与批量写入时同步。列表查询只扫这张表的复合索引，不再联 page/articlepage/频道中间表。"""
+    article=models.ForeignKey(ArticlePage,on_delete=models.CASCADE,related_name="listings")
+    site=models.ForeignKey("wagtailcore.Site",on_delete=models.CASCADE,related_name="+")
+    channel=models.ForeignKey(Channel,null=True,on_delete=models.CASCADE,related_name="+")
+    title=models.CharField(max_length=255)
+    url_path=models.TextField()
+    date=models.DateTimeField()
+    hero_image_id=models.IntegerField(null=True)
+    has_image=models.BooleanField(default=False)
+    is_featured=models.BooleanField(default=False)
+    feature_rank=models.IntegerField(default=0)
 
+    class Meta:
+        # 与 core.models.ORDER_CHOICES 的两种排序一一对应（末尾以文章 ID 决胜）。带 has_image 的两条同时服务“只要有图”的过滤
+        # 与首页候选集的窗口排名（按 频道+有无图 分区），分区与排序都走索引顺序；core.queryplans 检查这些查询不退化为全表扫描/排序
+        indexes=[
+            models.Index(fields=["site","channel","-is_featured","-feature_rank","-date","-article"],name="news_listing_featured"),
+            models.Index(fields=["site","channel","-date","-article"],name="news_listing_date"),
+            models.Index(fields=["site","channel","has_image","-is_featured","-feature_rank","-date","-article"],name="news_listing_featured_img"),
+            models.Index(fields=["site","channel","has_image","-date","-article"],name="news_listing_date_img"),
+            # 跨站门户（api_portal）不按站点过滤
+            models.Index(fields=["channel","-date","-article"],name="news_listing_portal"),
+            models.Index(fields=["channel","-date","-article"],condition=models.Q(has_image=True),name="news_listing_portal_img"),
+        ]
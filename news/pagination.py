@@ -0,0 +1,76 @@
+import base64, json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# 基于 (date, id) 的游标分页：不做 COUNT，也没有 OFFSET，任意深度的翻页代价相同。
+# 游标对外是不透明字符串（urlsafe base64 的 "ISO 时间|id"）。
+
+def encode_cursor(date,pk):
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{pk}".encode()).decode().rstrip("=")
+
+def decode_cursor(value):
+    """解析游标，返回 (datetime, id)；无效时返回 None。"""
+    if not value: return None
+    try:
+        raw=base64.urlsafe_b64decode(value+"="*(-len(value)%4)).decode()
+        date,pk=raw.rsplit("|",1)
+        date=parse_datetime(date)
+        return (date,int(pk)) if date else None
+    except (ValueError,UnicodeDecodeError):
+        return None
+
+def keyset_page(qs,size,after=None,before=None,key="id"):
+    """按 -date,-<key> 取一页（列表读模型用 key="article_id"，游标与文章表上的通用）。
+    after/before 为游标字符串；返回 (items, next_cursor, prev_cursor)。"""
+    after,before=decode_cursor(after),decode_cursor(before)
+    if before and not after:
+        d,pk=before
+        rows=list(qs.filter(Q(date__gt=d)|Q(date=d,**{f"{key}__gt":pk})).order_by("date",key)[:size+1])
+        has_prev=len(rows)>size; items=rows[:size][::-1]; has_next=True
+    else:
+        if after:
+            d,pk=after; qs=qs.filter(Q(date__lt=d)|Q(date=d,**{f"{key}__lt":pk}))
+        rows=list(qs.order_by("-date",f"-{key}")[:size+1])
+        has_next=len(rows)>size; items=rows[:size]; has_prev=bool(after)
+    next_cursor=encode_cursor(items[-1].date,getattr(items[-1],key)) if items and has_next else None
+    prev_cursor=encode_cursor(items[0].date,getattr(items[0],key)) if items and has_prev else None
+    return items,next_cursor,prev_cursor
+
+# 任意排序的位置游标：记录最后一行在各排序字段上的取值，下一页取严格排在其后的行。
+
+def position(obj,fields):
+    return [getattr(obj,f.lstrip("-")) for f in fields]
+
+def encode_position(values):
+    raw=json.dumps([v.isoformat() if hasattr(v,"isoformat") else v for v in values],separators=(",",":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_position(value,fields,model):
+    """解析位置游标，每个值按字段类型还原（日期还原为 datetime）；无效或类型不符时返回 None。"""
+    if not value: return None
+    try:
+        raw=json.loads(base64.urlsafe_b64decode(value+"="*(-len(value)%4)).decode())
+    except (ValueError,UnicodeDecodeError):
+        return None
+    if not isinstance(raw,list) or len(raw)!=len(fields): return None
+    out=[]
+    for f,v in zip(fields,raw):
+        field=model._meta.get_field(f.lstrip("-"))
+        # 游标来自请求参数：类型不符的值到 filter() 才报错会变成 500
+        try:
+            v=field.to_python(v)
+        except (ValidationError,TypeError,ValueError):
+            return None
+        if v is None and not field.null: return None
+        out.append(v)
+    return out
+
+def after_position(qs,fields,values):
+    """按 fields（- 前缀为降序）排序时严格位于 values 之后的行。"""
+    cond=Q(); eq={}
+    for f,v in zip(fields,values):
+        name=f.lstrip("-")
+        cond|=Q(**eq,**{f"{name}__{'lt' if f.startswith('-') else 'gt'}":v})
+        eq[name]=v
+    return qs.filter(cond).order_by(*fields)
@@ -0,0 +1,48 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.conf import settings
+from django.db import connection, connections
+from wagtail.images.models import Filter
+
+# 响应式渲染集：每个基础规格（如 fill-400x225）展开为 宽度阶梯 × 现代格式（AVIF/WebP），
+# 基础规格本身作为 <img> 的兼容回退。发布时在进程池里生成，模板输出 <picture>/srcset。
+
+FILL_RE=re.compile(r"^fill-(\d+)x(\d+)")
+MIME_TYPES={"avif":"image/avif","webp":"image/webp"}
+
+def ladder(spec):
+    """返回 [(format, [(width, spec), ...]), ...]；非 fill 规格不展开。"""
+    m=FILL_RE.match(spec)
+    if not m: return []
+    w,h=map(int,m.groups())
+    widths=sorted({x for x in settings.RESPONSIVE_WIDTHS if x<=2*w}|{w})
+    return [(fmt,[(x,f"fill-{x}x{round(x*h/w)}|format-{fmt}") for x in widths]) for fmt in settings.RESPONSIVE_FORMATS]
+
+def rendition_set(spec):
+    """基础规格 + 全部阶梯规格，用于预取与预生成。"""
+    return [spec]+[s for _,steps in ladder(spec) for _,s in steps]
+
+def _render(image_id,specs):
+    from wagtail.images import get_image_model
+    image=get_image_model().objects.filter(id=image_id).first()
+    if image is None: return 0
+    filters=[Filter(s) for s in specs]
+    existing=image.find_existing_renditions(*filters)
+    missing=[f for f in filters if f not in existing]
+    if missing: image.get_renditions(*missing)
+    return len(missing)
+
+def render_jobs(jobs,processes=None):
+    """jobs: {image_id: [spec, ...]}。按 (图片, 格式) 拆分后交给进程池，返回新生成的渲染数。"""
+    units=[]
+    for image_id,specs in jobs.items():
+        groups={}
+        for s in specs: groups.setdefault(s.partition("|format-")[2],[]).append(s)
+        units+=[(int(image_id),g) for g in groups.values()]
+    processes=settings.RENDITION_PROCESSES if processes is None else processes
+    if processes<=1 or len(units)<2 or connection.in_atomic_block:
+        return sum(_render(*u) for u in units)
+    connections.close_all()  # 子进程各自建立数据库连接
+    with ProcessPoolExecutor(max_workers=min(processes,len(units)),initializer=django.setup) as pool:
+        return sum(pool.map(_render,*zip(*units)))
@@ -0,0 +1,101 @@
+import bisect, threading, time
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+from core.profiling import external
+
+# 共享的 OpenSearch 查询客户端：进程内复用 keep-alive 连接池，超时可配置；
+# 连续失败达到阈值后熔断，熔断期间调用方直接走降级路径，冷却后放行一次试探请求。
+
+LATENCY_BUCKETS_MS=(5,10,25,50,100,250,500,1000,2500)
+
+class SearchUnavailable(Exception):
+    pass
+
+class CircuitBreaker:
+    CLOSED,OPEN,HALF_OPEN="closed","open","half_open"
+    def __init__(self,failure_threshold,reset_timeout):
+        self.failure_threshold=failure_threshold; self.reset_timeout=reset_timeout
+        self.state=self.CLOSED; self.failures=0; self.opened_at=0.0
+        self._lock=threading.Lock()
+    def allow(self):
+        with self._lock:
+            if self.state==self.CLOSED: return True
+            if self.state==self.OPEN and time.monotonic()-self.opened_at>=self.reset_timeout:
+                self.state=self.HALF_OPEN; return True  # 只放行一个试探请求
+            return False
+    def success(self):
+        with self._lock: self.state=self.CLOSED; self.failures=0
+    def failure(self):
+        with self._lock:
+            self.failures+=1
+            if self.state==self.HALF_OPEN or self.failures>=self.failure_threshold:
+                self.state=self.OPEN; self.opened_at=time.monotonic()
+
+class SearchMetrics:
+    def __init__(self):
+        self._lock=threading.Lock()
+        self.buckets=[0]*(len(LATENCY_BUCKETS_MS)+1); self.count=0; self.sum_ms=0.0
+        self.errors=0; self.rejected=0; self.fallbacks=0
+    def observe(self,ms):
+        with self._lock:
+            self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS,ms)]+=1; self.count+=1; self.sum_ms+=ms
+    def incr(self,name):
+        with self._lock: setattr(self,name,getattr(self,name)+1)
+    def snapshot(self):
+        with self._lock:
+            cumulative=[]; total=0
+            for n in self.buckets: total+=n; cumulative.append(total)
+            return {"latency_ms":{"buckets":dict(zip([*map(str,LATENCY_BUCKETS_MS),"+Inf"],cumulative)),
+                                  "count":self.count,"sum":round(self.sum_ms,3)},
+                    "errors":self.errors,"rejected":self.rejected,"fallbacks":self.fallbacks}
+
+class SearchClient:
+    def __init__(self,base=None,timeout=None,pool_size=None,failure_threshold=None,reset_timeout=None):
+        self.base=(base or settings.OS_URL).rstrip("/")
+        self.timeout=timeout or settings.OS_TIMEOUT
+        self.session=requests.Session()
+        adapter=HTTPAdapter(pool_connections=1,pool_maxsize=pool_size or settings.OS_POOL_SIZE)
+        self.session.mount("http://",adapter); self.session.mount("https://",adapter)
+        self.breaker=CircuitBreaker(failure_threshold or settings.OS_BREAKER_FAILURES,reset_timeout or settings.OS_BREAKER_RESET)
+        self.metrics=SearchMetrics()
+
+    def search(self,index,body):
+        """执行 _search；熔断、超时、连接错误、非 200 或响应体无法解析时抛出 SearchUnavailable。"""
+        if not self.breaker.allow():
+            self.metrics.incr("rejected"); raise SearchUnavailable("circuit open")
+        start=time.monotonic()
+        try:
+            with external("opensearch"): r=self.session.post(f"{self.base}/{index}/_search",json=body,timeout=self.timeout)
+        except requests.RequestException as e:
+            self._failed(); raise SearchUnavailable(str(e)) from e
+        finally:
+            self.metrics.observe((time.monotonic()-start)*1000)
+        if r.status_code!=200:
+            self._failed(); raise SearchUnavailable(f"HTTP {r.status_code}")
+        try:
+            data=r.json()
+        except ValueError as e:
+            # 200 但响应体被截断或不是 JSON（代理错误页等）同样计为失败
+            self._failed(); raise SearchUnavailable(f"invalid response: {e}") from e
+        self.breaker.success()
+        return data
+
+    def _failed(self):
+        self.metrics.incr("errors"); self.breaker.failure()
+
+    def record_fallback(self):
+        self.metrics.incr("fallbacks")
+
+    def stats(self):
+        return {"breaker":self.breaker.state,**self.metrics.snapshot()}
+
+_client=None
+_client_lock=threading.Lock()
+
+def get_search_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None: _client=SearchClient()
+    return _client
@@ -0,0 +1,110 @@
+import zlib
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max
+from .indexing import article_url, site_url_prefix
+from .models import ArticlePage, Channel
+
+# 站点地图：每个站点一个索引（/sitemap.xml），每个频道一个索引（/sitemaps/channel/<slug>.xml），
+# 文章按页面 ID 区间分片（每片 ID 跨度 SITEMAP_SHARD_SIZE，片内 URL 必然不超过 5 万），分片成员不随其他文章的发布/撤回移动，
+# 发布钩子只让文章所在的那一片失效并投递重建任务。分片用 keyset 分批读取、边生成边 gzip，
+# 未命中时以 StreamingHttpResponse 流式返回：查询结果与未压缩的 XML 只保留一批，
+# 压缩后的字节（约为 XML 的 1/10）全部收集起来，结束后整体写入缓存。没有文章的分片返回 404，不生成也不缓存。
+
+XML_HEAD='<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN='<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_OPEN='<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+CHUNK=2000
+
+def shard_of(article_id):
+    return article_id//settings.SITEMAP_SHARD_SIZE
+
+def scope(site_id,channel=None,shard=None):
+    """内容版本的作用域：站点/频道索引，或其中一个分片。"""
+    s=f"sitemap:{site_id}"+(f":ch:{channel}" if channel else "")
+    return s if shard is None else f"{s}:{shard}"
+
+def articles(site,channel=None):
+    qs=ArticlePage.objects.listed(site)
+    return qs.filter(channels__slug=channel) if channel else qs
+
+def _lastmod(dt):
+    return f"<lastmod>{dt.isoformat(timespec='seconds')}</lastmod>" if dt else ""
+
+def index_xml(site,channel=None):
+    """分片索引：一次 GROUP BY 得到非空分片及其最近发布时间。"""
+    S=settings.SITEMAP_SHARD_SIZE
+    rows=(articles(site,channel).annotate(shard=F("id")/S).values("shard").annotate(lastmod=Max("last_published_at")).order_by("shard"))
+    base=site.root_url+("/sitemaps/channel/"+channel if channel else "/sitemaps/articles")
+    parts=[XML_HEAD,INDEX_OPEN]
+    if not channel: parts.append(f"<sitemap><loc>{escape(site.root_url)}/sitemaps/pages.xml</loc></sitemap>\n")
+    parts+=[f"<sitemap><loc>{escape(base)}-{r['shard']}.xml.gz</loc>{_lastmod(r['lastmod'])}</sitemap>\n" for r in rows]
+    parts.append("</sitemapindex>\n")
+    return "".join(parts).encode()
+
+def pages_xml(site):
+    """首页与频道落地页。"""
+    from core.prerender import channel_paths
+    urls=[site.root_url+"/"]+[site.root_url+p for p in channel_paths(site)]
+    body="".join(f"<url><loc>{escape(u)}</loc><changefreq>hourly</changefreq></url>\n" for u in urls)
+    return (XML_HEAD+URLSET_OPEN+body+"</urlset>\n").encode()
+
+def _shard_qs(site,channel,shard):
+    S=settings.SITEMAP_SHARD_SIZE
+    return articles(site,channel).filter(id__gte=shard*S,id__lt=(shard+1)*S)
+
+def shard_exists(site,channel,shard):
+    return _shard_qs(site,channel,shard).exists()
+
+def shard_chunks(site,channel,shard):
+    """按 ID 升序 keyset 分批读取一个分片，逐批产出 XML 文本。"""
+    qs=_shard_qs(site,channel,shard).order_by("id")
+    prefix=site_url_prefix(site); last=-1
+    yield XML_HEAD+URLSET_OPEN
+    while True:
+        rows=list(qs.filter(id__gt=last).values_list("id","url_path","last_published_at")[:CHUNK])
+        if not rows: break
+        yield "".join(f"<url><loc>{escape(article_url(prefix,p))}</loc>{_lastmod(d)}</url>\n" for _,p,d in rows)
+        last=rows[-1][0]
+    yield "</urlset>\n"
+
+def gzip_chunks(chunks):
+    z=zlib.compressobj(6,zlib.DEFLATED,31)  # wbits=31：gzip 封装
+    for text in chunks:
+        data=z.compress(text.encode())
+        if data: yield data
+    yield z.flush()
+
+def cache_key(site_id,channel,shard):
+    return "sitemap:body:"+scope(site_id,channel,shard)
+
+def cached_shard(site,channel,shard):
+    """版本一致的缓存分片（gzip 字节），没有则返回 None。"""
+    from core.cache import content_version
+    entry=cache.get(cache_key(site.id,channel,shard))
+    if entry and entry["ver"]==content_version(scope(site.id,channel,shard)): return entry["body"]
+    return None
+
+def stream_shard(site,channel,shard):
+    """边生成边返回 gzip 数据，同时收集压缩后的字节；完整生成后写入缓存（客户端中途断开则不写）。"""
+    from core.cache import content_version
+    ver=content_version(scope(site.id,channel,shard)); parts=[]
+    for data in gzip_chunks(shard_chunks(site,channel,shard)):
+        parts.append(data); yield data
+    cache.set(cache_key(site.id,channel,shard),{"ver":ver,"body":b"".join(parts)},settings.SITEMAP_TTL)
+
+def build_shard(site,channel,shard):
+    """预生成并缓存一个分片；分片已没有文章时不缓存（请求会得到 404），返回是否生成。"""
+    if not shard_exists(site,channel,shard): return False
+    for _ in stream_shard(site,channel,shard): pass
+    return True
+
+def invalidate(site_id,article_ids):
+    """让这些文章所在的分片（站点与全部频道，文章可能刚离开某个频道）及各索引失效，返回涉及的分片号。"""
+    from core.cache import bump_content_version
+    shards=sorted({shard_of(i) for i in article_ids})
+    slugs=list(Channel.objects.values_list("slug",flat=True))
+    bump_content_version(scope(site_id),*[scope(site_id,s) for s in slugs],
+                         *[scope(site_id,c,n) for n in shards for c in [None,*slugs]])
+    return shards
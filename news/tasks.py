@@ -0,0 +1,132 @@
+from datetime import timedelta
+from hashlib import md5
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django_tasks import task
+from .indexing import BulkClient, page_ops
+from .renditions import render_jobs, rendition_set
+
+# 发布即索引：发布/撤回/删除信号只把页面写入 SearchIndexQueue（按页面合并）并投递一个延迟的 flush 任务，
+# 编辑的发布请求不等待 OpenSearch；worker（manage.py db_worker）批量出队并通过 _bulk 写入。
+
+def enqueue_search_sync(page_id):
+    from .models import SearchIndexQueue
+    SearchIndexQueue.objects.update_or_create(page_id=page_id)
+    t=flush_search_index
+    if t.get_backend().supports_defer and settings.SEARCH_SYNC_DELAY>0:
+        t=t.using(run_after=timezone.now()+timedelta(seconds=settings.SEARCH_SYNC_DELAY))
+    transaction.on_commit(t.enqueue)
+
+def enqueue_search_sync_many(page_ids):
+    """批量导入用：一条 INSERT 合并入队，只投递一个 flush 任务。"""
+    from .models import SearchIndexQueue
+    if not page_ids: return
+    SearchIndexQueue.objects.bulk_create([SearchIndexQueue(page_id=i) for i in page_ids],
+                                         update_conflicts=True,unique_fields=["page_id"],update_fields=["queued_at"])
+    transaction.on_commit(flush_search_index.enqueue)
+
+# 入队挂在 Wagtail 信号上而不是后台钩子：定时发布（publish_scheduled）与代码里的 revision.publish() 也会触发；
+# 删除栏目时级联删除的文章逐个发出 pre_delete，撤回栏目（含子页面）时每篇文章各发一次 page_unpublished
+
+def _article_changed(sender,instance,**kwargs):
+    if settings.OS_ENABLED: enqueue_search_sync(instance.id)
+
+def _article_moved(sender,instance,**kwargs):
+    from .models import ArticlePage
+    if settings.OS_ENABLED:
+        enqueue_search_sync_many(list(ArticlePage.objects.descendant_of(instance,inclusive=True).values_list("id",flat=True)))
+
+def connect_search_signals():
+    from django.db.models.signals import pre_delete
+    from wagtail.signals import page_published, page_unpublished, post_page_move
+    from .models import ArticlePage
+    page_published.connect(_article_changed,sender=ArticlePage,dispatch_uid="search-sync-published")
+    page_unpublished.connect(_article_changed,sender=ArticlePage,dispatch_uid="search-sync-unpublished")
+    pre_delete.connect(_article_changed,sender=ArticlePage,dispatch_uid="search-sync-deleted")
+    post_page_move.connect(_article_moved,dispatch_uid="search-sync-moved")
+
+@task()
+def flush_search_index(attempt=0):
+    """清空同步队列；失败时队列行保留，并按指数退避重新投递自己，直到 OpenSearch 恢复。"""
+    from .models import SearchIndexQueue
+    client=BulkClient(workers=1)
+    total=0
+    try:
+        while True:
+            rows=list(SearchIndexQueue.objects.order_by("queued_at").values_list("page_id","queued_at")[:settings.SEARCH_SYNC_BATCH])
+            if not rows: return total
+            ok,errors=client.send(page_ops(settings.OS_INDEX,[page_id for page_id,_ in rows]))
+            if errors: raise RuntimeError(f"OpenSearch sync failed for {len(errors)} docs: {errors[:3]}")
+            # 只删除未被再次入队的行：发送期间又发布的页面留给下一轮
+            done=Q()
+            for page_id,queued_at in rows: done|=Q(page_id=page_id,queued_at=queued_at)
+            SearchIndexQueue.objects.filter(done).delete()
+            total+=ok
+    except Exception:
+        _retry_flush(attempt)
+        raise
+
+def _retry_flush(attempt):
+    # 不支持延迟执行的后端（如 Immediate）立即重试只会递归，交给下一次发布触发
+    t=flush_search_index
+    if not t.get_backend().supports_defer: return
+    delay=min(settings.SEARCH_SYNC_RETRY*2**attempt,settings.SEARCH_SYNC_RETRY_MAX)
+    t.using(run_after=timezone.now()+timedelta(seconds=delay)).enqueue(attempt+1)
+
+# 渲染预生成：发布后把题图（含响应式阶梯）/正文图片缺失的渲染交给 worker，在进程池中生成；
+# 公开请求只读取已有渲染；模板里遇到仍缺失的渲染时也只投递任务，不在请求内做 Pillow 缩放。
+
+def enqueue_renditions(jobs):
+    """jobs: {image_id: [spec, ...]}；同一图片在 RENDITION_QUEUE_TTL 内只投递一次。"""
+    jobs={str(i):list(specs) for i,specs in jobs.items() if i and cache.add(f"renditions:queued:{i}:{md5(','.join(specs).encode()).hexdigest()[:12]}",1,settings.RENDITION_QUEUE_TTL)}
+    if jobs: transaction.on_commit(lambda:generate_renditions.enqueue(jobs))
+
+def article_rendition_jobs(page):
+    from .models import BODY_RENDITIONS, HERO_RENDITIONS
+    jobs={}
+    for block in page.body:
+        if block.block_type=="image" and block.value: jobs[block.value.id]=BODY_RENDITIONS
+    if page.hero_image_id: jobs[page.hero_image_id]=list(dict.fromkeys(s for spec in HERO_RENDITIONS for s in rendition_set(spec)))
+    return jobs
+
+@task()
+def generate_renditions(jobs):
+    return render_jobs(jobs)
+
+# 站点地图：发布/撤回/删除文章后（事务提交时）让所在分片失效，并在后台重建站点分片与文章当前频道的分片
+
+def enqueue_sitemap_refresh(site_id,article_id):
+    from .models import ArticlePage
+    from .sitemaps import invalidate
+    def refresh():
+        shard=invalidate(site_id,[article_id])[0]
+        channels=[c for c in ArticlePage.objects.filter(id=article_id).values_list("channels__slug",flat=True) if c]
+        rebuild_sitemap_shards.enqueue(site_id,shard,channels)
+    transaction.on_commit(refresh)
+
+@task()
+def rebuild_sitemap_shards(site_id,shard,channels):
+    from core.sites import registry
+    from .sitemaps import build_shard
+    site=registry.get(site_id)
+    if site is None: return 0
+    return sum(build_shard(site,channel,shard) for channel in [None,*channels])
+
+# 列表读模型全量重建：站点根页面变化时由 news.listing 投递
+
+@task()
+def rebuild_article_listing():
+    from .listing import invalidate_reads, rebuild
+    n=rebuild(); invalidate_reads()
+    return n
+
+# 热度排行：由定时器（cron / manage.py refresh_hot_rankings --every 60）或该任务触发
+
+@task()
+def refresh_hot_rankings():
+    from .hot import refresh
+    updated,changed=refresh()
+    return {"updated":updated,"changed":len(changed)}
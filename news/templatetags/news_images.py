@@ -0,0 +1,43 @@
+import re
+from django import template
+from django.utils.html import format_html, format_html_join
+from wagtail.images.models import Filter
+from news.renditions import MIME_TYPES, ladder
+
+register=template.Library()
+
+# {% ready_image a.hero_image "fill-400x225" sizes="(max-width: 600px) 100vw, 400px" %}
+# 只使用已生成（或已预取）的渲染，从不在请求内缩放图片：输出 <picture>，按格式给出 AVIF/WebP 的 srcset，
+# 基础规格作为 <img> 回退。渲染尚未生成时投递后台任务，缺失的部分先省略（基础规格缺失时输出按目标尺寸裁切显示的原图）。
+
+SIZE_RE=re.compile(r"(\d+)x(\d+)")
+
+def _fallback(image,spec):
+    m=SIZE_RE.search(spec)
+    width,height=(m.groups() if m else (image.width,image.height))
+    return format_html('<img alt="{}" src="{}" width="{}" height="{}" style="object-fit:cover" loading="lazy">',
+                       image.default_alt_text,image.file.url,width,height)
+
+@register.simple_tag(takes_context=True)
+def ready_image(context,image,spec,sizes=None,**attrs):
+    if not image: return ""
+    steps=ladder(spec)
+    filters=[Filter(spec)]+[Filter(s) for _,fmt_steps in steps for _,s in fmt_steps]
+    found={f.spec:r for f,r in image.find_existing_renditions(*filters).items()}
+    missing=[f.spec for f in filters if f.spec not in found]
+    if missing:
+        from core.pagecache import skip_page_cache
+        from news.tasks import enqueue_renditions
+        enqueue_renditions({image.id:missing})
+        skip_page_cache(context.get("request"))
+    base=found.get(spec)
+    img=base.img_tag(attrs) if base else _fallback(image,spec)
+    sources=[]
+    for fmt,fmt_steps in steps:
+        srcset=", ".join(f"{found[s].url} {w}w" for w,s in fmt_steps if s in found)
+        if srcset: sources.append((MIME_TYPES.get(fmt,f"image/{fmt}"),srcset))
+    if not sources: return img
+    width=SIZE_RE.search(spec).group(1)
+    sizes=sizes or f"(max-width: {width}px) 100vw, {width}px"
+    return format_html("<picture>{}{}</picture>",
+                       format_html_join("",'<source type="{}" srcset="{}" sizes="{}">',((t,ss,sizes) for t,ss in sources)),img)
@@ -0,0 +1,152 @@
+import json, re, threading
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from news.indexing import BulkClient, delete_op, index_op
+
+# 本地 HTTP 替身：按脚本应答 _bulk，并在内存里维护索引与别名，覆盖 BulkClient 的重试、部分失败与别名切换路径
+
+class FakeOpenSearch:
+    def __init__(self):
+        self.indices={}    # 索引名 -> 别名集合
+        self.bulk=[]       # 每次 _bulk 请求的操作 [(action, _id)]
+        self.calls=[]      # (method, path)
+        self.script=[]     # _bulk 应答：HTTP 状态码，或前几条的状态码列表（其余成功）；用完后全部成功
+        self.aliases_body=None
+
+    def handle(self,method,path,body):
+        self.calls.append((method,path))
+        if path=="/_bulk":
+            lines=[json.loads(l) for l in body.decode().splitlines() if l]
+            ops=[]
+            for l in lines:
+                if "index" in l or "delete" in l:
+                    action,meta=next(iter(l.items())); ops.append((action,meta["_id"]))
+            self.bulk.append(ops)
+            step=self.script.pop(0) if self.script else None
+            if isinstance(step,int): return step,{"error":"busy"}
+            statuses=(step or [])+[201]*(len(ops)-len(step or []))
+            items=[{action:{"_id":i,"status":s,**({"error":{"type":"mapper_parsing_exception"}} if s>=300 else {})}}
+                   for (action,i),s in zip(ops,statuses)]
+            return 200,{"errors":any(s>=300 for s in statuses),"items":items}
+        if path=="/_aliases" and method=="POST":
+            self.aliases_body=json.loads(body)
+            for a in self.aliases_body["actions"]:
+                (kind,arg),=a.items()
+                if kind=="remove": self.indices[arg["index"]].discard(arg["alias"])
+                elif kind=="remove_index": del self.indices[arg["index"]]
+                elif kind=="add": self.indices[arg["index"]].add(arg["alias"])
+            return 200,{"acknowledged":True}
+        m=re.fullmatch(r"/_alias/(\w+)",path)
+        if m:
+            found={i:{"aliases":{m[1]:{}}} for i,aliases in self.indices.items() if m[1] in aliases}
+            return (200,found) if found else (404,{})
+        m=re.fullmatch(r"/(\w+)\*",path)
+        if m and method=="GET":
+            found={i:{} for i in self.indices if i.startswith(m[1])}
+            return (200,found) if found else (404,{})
+        m=re.fullmatch(r"/(\w+)(/_settings|/_refresh)?",path)
+        if m:
+            index,sub=m[1],m[2]
+            if method=="PUT" and not sub:
+                if index in self.indices: return 400,{"error":{"type":"resource_already_exists_exception"}}
+                self.indices[index]=set(); return 200,{"acknowledged":True}
+            if index not in self.indices: return 404,{}
+            return 200,{}
+        return 404,{}
+
+@pytest.fixture
+def opensearch():
+    fake=FakeOpenSearch()
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self):
+            body=self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            status,data=fake.handle(self.command,self.path,body)
+            payload=json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type","application/json"); self.send_header("Content-Length",str(len(payload)))
+            self.end_headers()
+            if self.command!="HEAD": self.wfile.write(payload)
+        do_GET=do_PUT=do_POST=do_DELETE=do_HEAD=reply
+        def log_message(self,*args): pass
+    server=ThreadingHTTPServer(("127.0.0.1",0),Handler)
+    thread=threading.Thread(target=server.serve_forever,daemon=True); thread.start()
+    fake.url=f"http://127.0.0.1:{server.server_port}"
+    yield fake
+    server.shutdown(); server.server_close()
+
+def ops(n,index="news"):
+    return [index_op(index,{"id":i,"title":f"t{i}"}) for i in range(1,n+1)]
+
+def client(fake,**kwargs):
+    return BulkClient(base=fake.url,backoff=0,timeout=5,**kwargs)
+
+def test_all_items_indexed(opensearch):
+    assert client(opensearch).send(ops(3))==(3,[])
+    assert opensearch.bulk==[[("index",1),("index",2),("index",3)]]
+
+def test_whole_request_retried_on_429_and_503(opensearch):
+    opensearch.script=[429,503]
+    assert client(opensearch).send(ops(2))==(2,[])
+    assert len(opensearch.bulk)==3 and opensearch.bulk[0]==opensearch.bulk[2]
+
+def test_gives_up_after_max_retries(opensearch):
+    opensearch.script=[503]*10
+    ok,errors=client(opensearch,max_retries=2).send(ops(2))
+    assert ok==0 and len(errors)==1 and errors[0].startswith("HTTP 503")
+    assert len(opensearch.bulk)==3
+
+def test_non_retryable_status_fails_batch(opensearch):
+    opensearch.script=[400]
+    ok,errors=client(opensearch).send(ops(2))
+    assert ok==0 and errors[0].startswith("HTTP 400") and len(opensearch.bulk)==1
+
+def test_partial_errors_retry_only_throttled_items(opensearch):
+    opensearch.script=[[201,429,400]]
+    ok,errors=client(opensearch).send(ops(3))
+    assert ok==2
+    assert len(errors)==1 and errors[0].startswith("3:") and "mapper_parsing_exception" in errors[0]
+    assert opensearch.bulk[1]==[("index",2)]
+
+def test_throttled_items_give_up_after_max_retries(opensearch):
+    opensearch.script=[[201,429],[429],[429]]
+    ok,errors=client(opensearch,max_retries=2).send(ops(2))
+    assert ok==1 and len(errors)==1 and errors[0].startswith("2:")
+    assert [len(b) for b in opensearch.bulk]==[2,1,1]
+
+def test_missing_document_delete_counts_as_done(opensearch):
+    opensearch.script=[[404]]
+    assert client(opensearch).send([delete_op("news",7)])==(1,[])
+
+def test_connection_errors_are_retried_then_reported():
+    ok,errors=BulkClient(base="http://127.0.0.1:9",backoff=0,max_retries=1,timeout=1).send(ops(1))
+    assert ok==0 and len(errors)==1
+
+def test_run_splits_batches_and_reports_each(opensearch):
+    opensearch.script=[None,[400]]
+    seen=[]
+    ok,errors=client(opensearch,workers=1).run(iter(ops(5)),bulk_size=2,on_result=lambda n,errs:seen.append((n,len(errs))))
+    assert ok==4 and len(errors)==1
+    assert [len(b) for b in opensearch.bulk]==[2,2,1] and seen==[(2,0),(1,1),(1,0)]
+
+def test_versioned_build_swaps_alias(opensearch):
+    c=client(opensearch)
+    assert c.next_version("news")=="news_v1"
+    opensearch.indices={"news_v1":{"news"}}
+    index=c.next_version("news")
+    assert index=="news_v2" and c.ensure_index(index) and c.ensure_index(index)
+    c.finalize(index)
+    assert ("PUT","/news_v2/_settings") in opensearch.calls and ("POST","/news_v2/_refresh") in opensearch.calls
+    assert c.swap_alias("news",index)==["news_v1"]
+    assert opensearch.aliases_body=={"actions":[{"remove":{"index":"news_v1","alias":"news"}},{"add":{"index":"news_v2","alias":"news"}}]}
+    assert c.alias_targets("news")==["news_v2"]
+
+def test_swap_alias_replaces_concrete_index(opensearch):
+    opensearch.indices={"news":set(),"news_v1":set()}
+    assert client(opensearch).swap_alias("news","news_v1")==[]
+    assert opensearch.aliases_body["actions"]==[{"remove_index":{"index":"news"}},{"add":{"index":"news_v1","alias":"news"}}]
+    assert opensearch.indices=={"news_v1":{"news"}}
+
+def test_finalize_raises_for_missing_index(opensearch):
+    with pytest.raises(requests.HTTPError):
+        client(opensearch).finalize("missing")
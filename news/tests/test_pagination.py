@@ -0,0 +1,47 @@
+import base64, json
+import pytest
+from datetime import datetime, timezone as tz
+from django.test import Client
+from core.models import HomeToggles
+from core.sites import registry
+from core.snapshot import get_home_snapshot
+from news.listing import order_fields
+from news.models import ArticleListing, Channel
+from news.pagination import decode_position, encode_position
+
+FIELDS=order_fields("-is_featured,-feature_rank,-date")
+
+def cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def test_round_trip():
+    values=[True,3,datetime(2025,1,2,3,4,5,tzinfo=tz.utc),42]
+    assert decode_position(encode_position(values),FIELDS,ArticleListing)==values
+
+@pytest.mark.parametrize("value",[
+    "not base64!",cursor([True,3,"2025-01-02T03:04:05+00:00"]),cursor({"a":1}),
+    cursor(["maybe",3,"2025-01-02T03:04:05+00:00",42]),cursor([True,"x","2025-01-02T03:04:05+00:00",42]),
+    cursor([True,3,"yesterday",42]),cursor([True,3,5,42]),cursor([True,3,"2025-01-02T03:04:05+00:00",[1]]),
+    cursor([True,None,"2025-01-02T03:04:05+00:00",42])])
+def test_invalid_cursors(value):
+    assert decode_position(value,FIELDS,ArticleListing) is None
+
+def test_more_items_rejects_tampered_cursor(news_sites):
+    site=news_sites[0]
+    HomeToggles.objects.update_or_create(site=site,defaults={"featured_target":0})
+    page=site.root_page.specific
+    page.modules=[("channel",{"channel":Channel.objects.get(slug="tech"),"limit":2,
+                              "ordering":"-is_featured,-feature_rank,-date","title":"科技"})]
+    page.save_revision().publish(); registry.invalidate()
+    site=registry.get(site.id); home=registry.home(site)
+    module=get_home_snapshot(home,site,registry.toggles(site))["modules"][0]
+    client=Client(HTTP_HOST=f"{site.hostname}:{site.port}")
+    url="/fragments/more-items/"
+    valid=encode_position([False,0,datetime.now(tz.utc),10**6])
+    assert client.get(url,{"sig":module["sig"],"after":valid}).status_code==200
+    tampered=cursor([{"x":1},0,"2025-01-02T03:04:05+00:00",1])
+    assert client.get(url,{"sig":module["sig"],"after":tampered}).status_code==400
+
+def test_order_fields_share_the_id_tiebreak():
+    assert order_fields("-is_featured,-date")==["-is_featured","-date","-article_id"]
+    assert order_fields("-date","id")==["-date","-id"]
@@ -0,0 +1,39 @@
+import pytest
+from django.test import override_settings
+from news.models import ArticlePage, SearchIndexQueue, SectionIndexPage
+
+@pytest.fixture
+def queue(news_sites):
+    SearchIndexQueue.objects.all().delete()
+    with override_settings(OS_ENABLED=True):
+        yield lambda:set(SearchIndexQueue.objects.values_list("page_id",flat=True))
+
+def test_programmatic_publish_queues_sync(queue):
+    a=ArticlePage.objects.live().first()
+    a.title="改过的标题"; a.save_revision().publish()
+    assert queue()=={a.id}
+
+def test_unpublish_queues_sync(queue):
+    a=ArticlePage.objects.live().first()
+    a.unpublish()
+    assert queue()=={a.id}
+
+def test_section_delete_queues_every_article(queue,news_sites):
+    section=SectionIndexPage.objects.descendant_of(news_sites[0].root_page).first()
+    ids=set(ArticlePage.objects.child_of(section).values_list("id",flat=True))
+    assert ids
+    section.delete()
+    assert queue()==ids
+
+def test_section_unpublish_queues_every_article(queue,news_sites,admin_user):
+    from wagtail.actions.unpublish_page import UnpublishPageAction
+    section=SectionIndexPage.objects.descendant_of(news_sites[0].root_page).first()
+    ids=set(ArticlePage.objects.child_of(section).values_list("id",flat=True))
+    UnpublishPageAction(section,user=admin_user,include_descendants=True).execute(skip_permission_checks=True)
+    assert queue()==ids
+
+def test_disabled_search_queues_nothing(news_sites):
+    SearchIndexQueue.objects.all().delete()
+    with override_settings(OS_ENABLED=False):
+        ArticlePage.objects.live().first().save_revision().publish()
+    assert not SearchIndexQueue.objects.exists()
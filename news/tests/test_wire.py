@@ -0,0 +1,22 @@
+import json
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from news.models import ArticlePage
+
+@pytest.fixture
+def feed(tmp_path):
+    path=tmp_path/"wire.ndjson"
+    path.write_text(json.dumps({"id":"wire:1","title":"通讯社稿件","body":"正文"},ensure_ascii=False)+"\n",encoding="utf-8")
+    return str(path)
+
+def test_unknown_channel_is_rejected(news_sites,feed):
+    with pytest.raises(CommandError,match="unknown channel: nope"):
+        call_command("import_wire",feed,"--channel","nope")
+    assert not ArticlePage.objects.filter(external_id="wire:1").exists()
+
+def test_default_channel_applies(news_sites,feed):
+    call_command("import_wire",feed,"--channel","tech",stdout=StringIO())
+    a=ArticlePage.objects.get(external_id="wire:1")
+    assert [c.slug for c in a.channels.all()]==["tech"]
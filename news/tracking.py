@@ -0,0 +1,98 @@
+import atexit, logging, os, threading, time
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+# 曝光/浏览/点击打点：记录只是往本进程的环形缓冲（deque，满了丢最旧的）追加一个元组，不碰数据库和缓存；
+# 后台线程每 TRACKING_FLUSH_INTERVAL 秒取空缓冲，按 (文章, 站点, 分钟) 预聚合后一次 bulk INSERT 到 ArticleEvents，
+# 同时把浏览/点击计数交给热度排行。ArticleEvents 只追加：同一分钟可能有多行（多个进程/多次刷写），查询时求和。
+# 来源：文章页服务钩子（浏览）、整页缓存命中时回放、/api/track 信标（卡片曝光、点击、静态预渲染页的浏览）。
+
+KINDS=("impression","view","click")
+MAX_ARTICLE_ID=2**31-1
+
+class EventBuffer:
+    def __init__(self):
+        self._events=deque(maxlen=settings.TRACKING_BUFFER_SIZE)
+        self._lock=threading.Lock(); self._pid=None
+
+    def append(self,article_id,kind,site_id=None):
+        self._events.append((article_id,kind,site_id,int(time.time())//60))
+        if self._pid!=os.getpid(): self._start()
+
+    def _start(self):
+        # fork 之后线程不会被复制：按进程号判断，每个 worker 各自启动一次
+        with self._lock:
+            if self._pid==os.getpid(): return
+            self._pid=os.getpid()
+            threading.Thread(target=self._loop,name="tracking-flush",daemon=True).start()
+
+    def drain(self):
+        events=self._events; out=[]
+        try:
+            while True: out.append(events.popleft())
+        except IndexError:
+            return out
+
+    def _loop(self):
+        while True:
+            time.sleep(settings.TRACKING_FLUSH_INTERVAL)
+            try:
+                flush(self)
+            except Exception:
+                logging.getLogger(__name__).exception("tracking flush failed")
+            finally:
+                close_old_connections()
+
+_buffer=None
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer=EventBuffer(); atexit.register(lambda:_buffer._events and flush(_buffer))
+    return _buffer
+
+def track(article_id,kind="view",site_id=None):
+    if settings.TRACKING_ENABLED: get_buffer().append(article_id,kind,site_id)
+
+def track_many(events,site_id=None):
+    """events: [(article_id, kind), ...]"""
+    if settings.TRACKING_ENABLED:
+        buf=get_buffer()
+        for article_id,kind in events: buf.append(article_id,kind,site_id)
+
+def aggregate(events):
+    """[(article_id, kind, site_id, minute), ...] -> {(article_id, site_id, minute): [曝光, 浏览, 点击]}"""
+    rows={}
+    for article_id,kind,site_id,minute in events:
+        counts=rows.get((article_id,site_id,minute))
+        if counts is None: counts=rows[(article_id,site_id,minute)]=[0,0,0]
+        counts[KINDS.index(kind)]+=1
+    return rows
+
+def flush(buffer=None):
+    """取空缓冲并写入，返回写入的行数。"""
+    from .hot import record
+    from .models import ArticleEvents
+    rows={k:v for k,v in aggregate((buffer or get_buffer()).drain()).items() if 0<k[0]<=MAX_ARTICLE_ID}
+    if not rows: return 0
+    objs=[ArticleEvents(article_id=a,site_id=s,minute=datetime.fromtimestamp(m*60,dt_timezone.utc),impressions=i,views=v,clicks=c)
+          for (a,s,m),(i,v,c) in rows.items()]
+    try:
+        with transaction.atomic(): ArticleEvents.objects.bulk_create(objs,batch_size=1000)
+    except DatabaseError:
+        # 整批失败时逐行重试，只丢弃写不进去的行，其余计数照常保留
+        failed=0
+        for obj in objs:
+            try:
+                with transaction.atomic(): obj.save(force_insert=True)
+            except DatabaseError:
+                failed+=1
+        logging.getLogger(__name__).warning("tracking flush: dropped %d of %d rows",failed,len(objs))
+    hot={}
+    for (a,_,_),(_,v,c) in rows.items():
+        hot[(a,"view")]=hot.get((a,"view"),0)+v; hot[(a,"click")]=hot.get((a,"click"),0)+c
+    for (a,kind),n in hot.items():
+        if n: record(a,kind,n)
+    return len(rows)
@@ -0,0 +1,26 @@
+from wagtail import hooks
+from .models import ArticlePage
+from .tracking import track
+from .tasks import article_rendition_jobs, enqueue_renditions, enqueue_sitemap_refresh
+
+@hooks.register("after_publish_page")
+@hooks.register("after_unpublish_page")
+@hooks.register("after_delete_page")
+def refresh_article_sitemaps(request, page):
+    from core.sites import registry
+    cls=page.specific_class
+    site=registry.for_page(page) if cls and issubclass(cls,ArticlePage) else None
+    if site: enqueue_sitemap_refresh(site.id,page.id)
+
+@hooks.register("after_publish_page")
+def pregenerate_article_renditions(request, page):
+    cls=page.specific_class
+    if cls and issubclass(cls,ArticlePage): enqueue_renditions(article_rendition_jobs(page.specific))
+
+@hooks.register("before_serve_page")
+def count_article_view(page, request, serve_args, serve_kwargs):
+    # 静态预渲染的请求不计数（那份页面由前端信标记浏览）；记下事件，整页缓存命中时回放
+    if isinstance(page,ArticlePage) and request.method=="GET" and not getattr(request,"prerendered",False):
+        site=getattr(request,"_wagtail_site",None)
+        track(page.id,"view",site.id if site else None)
+        request._page_cache_track=[(page.id,"view")]
@@ -0,0 +1,220 @@
+import hashlib, html, json, re
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from defusedxml.ElementTree import iterparse
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.html import strip_tags
+from django.utils.text import slugify
+from wagtail.models import Page, Revision
+from .bulk import bulk_create_articles, replace_relations
+from .listing import sync as sync_listing
+from .models import ArticlePage, Channel
+
+# 通讯社稿件导入：NDJSON 或 RSS/Atom 流式解析成统一记录，按批（每批一个事务）写入：
+#   新稿件 —— 批量分配 treebeard 路径建页并直接发布（news.bulk）；
+#   已导入的稿件（external_id 相同）—— 内容摘要不变则跳过，变化则批量更新正文、频道与标签，并为编辑过的页面补一条修订；
+#   external_id 全局唯一：已导入到其他站点的稿件不会被改写，计为冲突（conflicts）；
+# 同一文件重复导入不产生任何写入。记录格式（NDJSON 每行一个）：
+#   {"id": "xinhua:0001", "title": "...", "date": "2025-01-01T08:00:00+08:00",
+#    "body": "段落\n\n段落" 或 ["段落", ...], "channels": ["tech"], "tags": ["AI"], "featured": false}
+# RSS/Atom 的分类（category）能对上频道 slug/名称的归入频道，其余作为标签。
+
+ATOM="{http://www.w3.org/2005/Atom}"
+PARAGRAPH_BREAK=re.compile(r"</p\s*>|<br\s*/?>",re.I)
+
+class WireError(ValueError):
+    pass
+
+def paragraphs(text):
+    if isinstance(text,(list,tuple)): items=text
+    else: items=re.split(r"\n\s*\n|\n",html.unescape(strip_tags(PARAGRAPH_BREAK.sub("\n\n",text or ""))))
+    return [p.strip() for p in items if p and p.strip()]
+
+def parse_date(value):
+    if not value or isinstance(value,datetime): return value or None
+    dt=parse_datetime(value.strip())
+    if dt is None:
+        try: dt=parsedate_to_datetime(value.strip())
+        except (TypeError,ValueError): raise WireError(f"invalid date: {value!r}")
+    return dt if timezone.is_aware(dt) else timezone.make_aware(dt)
+
+def record(external_id,title,date=None,body=None,categories=(),channels=(),tags=(),featured=False):
+    if not external_id or not (title or "").strip(): raise WireError(f"record needs an id and a title: {external_id!r}")
+    return {"external_id":str(external_id)[:255],"title":title.strip()[:255],"date":parse_date(date),
+            "body":paragraphs(body),"categories":[c.strip() for c in categories if c and c.strip()],
+            "channels":[c.strip() for c in channels if c and c.strip()],"tags":[t.strip()[:100] for t in tags if t and t.strip()],
+            "featured":bool(featured)}
+
+def read_ndjson(stream):
+    for n,line in enumerate(stream,1):
+        if isinstance(line,bytes): line=line.decode("utf-8")
+        if not line.strip(): continue
+        try:
+            d=json.loads(line)
+            yield record(d.get("id") or d.get("external_id"),d.get("title"),d.get("date"),d.get("body"),
+                         d.get("categories",()),d.get("channels",()),d.get("tags",()),d.get("featured",False))
+        except (ValueError,AttributeError) as e:
+            yield WireError(f"line {n}: {e}")
+
+def _text(elem,*names):
+    for name in names:
+        child=elem.find(name)
+        if child is not None and (child.text or "").strip(): return child.text
+    return None
+
+def read_feed(stream):
+    """RSS 2.0 的 <item> 与 Atom 的 <entry>；逐条解析后清掉元素，内存占用与文件大小无关。"""
+    for _,elem in iterparse(stream,events=("end",)):
+        if elem.tag=="item":
+            cats=[c.text for c in elem.findall("category")]
+            rec=(_text(elem,"guid","link"),_text(elem,"title"),_text(elem,"pubDate","{http://purl.org/dc/elements/1.1/}date"),
+                 _text(elem,"{http://purl.org/rss/1.0/modules/content/}encoded","description"),cats)
+        elif elem.tag==f"{ATOM}entry":
+            cats=[c.get("term") or c.get("label") for c in elem.findall(f"{ATOM}category")]
+            rec=(_text(elem,f"{ATOM}id"),_text(elem,f"{ATOM}title"),_text(elem,f"{ATOM}published",f"{ATOM}updated"),
+                 _text(elem,f"{ATOM}content",f"{ATOM}summary"),cats)
+        else:
+            continue
+        try: yield record(*rec)
+        except WireError as e: yield e
+        elem.clear()
+
+def read_records(stream,fmt="auto"):
+    """stream 为二进制文件对象；fmt: auto / ndjson / feed。解析失败的记录以 WireError 对象产出，由调用方计数。"""
+    if fmt=="auto":
+        head=stream.peek(64) if hasattr(stream,"peek") else b""
+        fmt="feed" if head.lstrip().startswith(b"<") else "ndjson"
+    if fmt=="ndjson": return read_ndjson(stream)
+    if fmt=="feed": return read_feed(stream)
+    raise WireError(f"unknown format: {fmt}")
+
+def content_hash(rec):
+    data=[rec["title"],rec["date"].isoformat() if rec["date"] else None,rec["body"],sorted(rec["channels"]),
+          sorted(rec["categories"]),sorted(rec["tags"]),rec["featured"]]
+    return hashlib.md5(json.dumps(data,ensure_ascii=False).encode()).hexdigest()
+
+class ChannelMatcher:
+    """频道按 slug 或名称（不区分大小写）匹配；匹配不上的分类作为标签。"""
+    def __init__(self):
+        self.by_key={}
+        for cid,slug,name in Channel.objects.filter(is_active=True).values_list("id","slug","name"):
+            self.by_key[slug.lower()]=cid; self.by_key[name.lower()]=cid
+
+    def split(self,rec,default=None):
+        ids=[self.by_key[c.lower()] for c in rec["channels"] if c.lower() in self.by_key]
+        tags=list(rec["tags"])
+        for c in rec["categories"]:
+            cid=self.by_key.get(c.lower())
+            if cid: ids.append(cid)
+            else: tags.append(c[:100])
+        if not ids and default: ids=[default]
+        return list(dict.fromkeys(ids)),list(dict.fromkeys(tags))
+
+def _slug(rec):
+    # 稳定的 slug：标题 + 来源 ID 摘要，重复导入、不同稿件同名都不会冲突
+    base=slugify(rec["title"],allow_unicode=True)[:60].strip("-") or "wire"
+    return f"{base}-{hashlib.md5(rec['external_id'].encode()).hexdigest()[:8]}"
+
+def _body(rec):
+    return [{"type":"paragraph","value":p} for p in rec["body"]]
+
+def _save_revisions(page_ids):
+    # bulk_update 不经过修订：编辑器打开页面时读取 latest_revision，再发布就会把稿件改回旧内容。
+    # 已有修订的页面（在后台保存过）补一条与当前内容一致的修订并设为 latest/live；从未保存过的页面直接读页面本身
+    from django.contrib.contenttypes.models import ContentType
+    pages=list(ArticlePage.objects.filter(pk__in=page_ids,latest_revision__isnull=False))
+    if not pages: return
+    ct=ContentType.objects.get_for_model(ArticlePage); base=ContentType.objects.get_for_model(Page); now=timezone.now()
+    revs=Revision.objects.bulk_create([Revision(content_type=ct,base_content_type=base,object_id=str(a.pk),object_str=str(a),
+                                                created_at=now,content=a.serializable_data()) for a in pages])
+    for a,r in zip(pages,revs): a.latest_revision=a.live_revision=r; a.has_unpublished_changes=False
+    Page.objects.bulk_update(pages,["latest_revision","live_revision","has_unpublished_changes"])
+
+class Importer:
+    """把记录按批写入 parent（SectionIndexPage）下；stats 统计新建/更新/未变/冲突/无效条数。"""
+    def __init__(self,parent,default_channel=None):
+        from core.sites import registry
+        self.parent=parent; self.matcher=ChannelMatcher()
+        self.site=registry.for_page(parent)
+        self.default_channel=Channel.objects.filter(slug=default_channel).values_list("id",flat=True).first() if default_channel else None
+        if default_channel and self.default_channel is None: raise WireError(f"unknown channel: {default_channel}")
+        self.stats={"created":0,"updated":0,"unchanged":0,"conflicts":0,"invalid":0}
+        self.touched_channels=set(); self.written=[]
+
+    def run(self,records,batch_size=500,on_batch=None):
+        batch={}
+        for rec in records:
+            if isinstance(rec,WireError):
+                self.stats["invalid"]+=1; continue
+            batch[rec["external_id"]]=rec  # 同批内重复的稿件以最后一条为准
+            if len(batch)>=batch_size:
+                self.write(list(batch.values())); batch={}
+                if on_batch: on_batch(self.stats)
+        if batch:
+            self.write(list(batch.values()))
+            if on_batch: on_batch(self.stats)
+        return self.stats
+
+    @transaction.atomic
+    def write(self,records):
+        from .tasks import enqueue_search_sync_many
+        now=timezone.now()
+        existing={a.external_id:a for a in ArticlePage.objects.filter(external_id__in=[r["external_id"] for r in records])
+                  .only("id","path","url_path","external_id","external_hash","title","date","body","is_featured")}
+        new,new_rel,changed,changed_rel=[],[],[],[]
+        for rec in records:
+            h=content_hash(rec); rel=self.matcher.split(rec,self.default_channel)
+            a=existing.get(rec["external_id"])
+            if a is not None and not self._same_site(a):
+                self.stats["conflicts"]+=1; continue
+            if a is None:
+                new.append(ArticlePage(title=rec["title"],slug=_slug(rec),date=rec["date"] or now,body=_body(rec),
+                                       is_featured=rec["featured"],external_id=rec["external_id"],external_hash=h))
+                new_rel.append(rel)
+            elif a.external_hash!=h:
+                a.title=a.draft_title=rec["title"]; a.date=rec["date"] or a.date; a.body=_body(rec)
+                a.is_featured=rec["featured"]; a.external_hash=h; a.last_published_at=now
+                changed.append(a); changed_rel.append(rel)
+            else:
+                self.stats["unchanged"]+=1
+        if new:
+            # 已有同名 slug 的兄弟页面（如手工建过同一稿件）时改用更长的摘要
+            taken=set(Page.objects.filter(path__startswith=self.parent.path,depth=self.parent.depth+1,
+                                          slug__in=[a.slug for a in new]).values_list("slug",flat=True))
+            for a in new:
+                if a.slug in taken: a.slug=f"{a.slug}-{hashlib.md5(a.external_id.encode()).hexdigest()[8:16]}"
+            bulk_create_articles(self.parent,new,[c for c,_ in new_rel],[t for _,t in new_rel])
+        if changed:
+            ArticlePage.objects.bulk_update(changed,["title","draft_title","last_published_at","date","body","is_featured","external_hash"])
+            replace_relations(changed,[c for c,_ in changed_rel],[t for _,t in changed_rel])
+            _save_revisions([a.pk for a in changed])
+            sync_listing([a.pk for a in changed])
+        for cs,_ in new_rel+changed_rel: self.touched_channels.update(cs)
+        self.written+=[(a.pk,a.url_path) for a in new+changed]
+        if settings.OS_ENABLED: enqueue_search_sync_many([a.pk for a in new+changed])
+        self.stats["created"]+=len(new); self.stats["updated"]+=len(changed)
+
+    def _same_site(self,page):
+        from core.sites import registry
+        return registry.for_page(page)==self.site
+
+    def finish(self,site):
+        """导入结束后让站点首页快照、接口缓存与整页缓存失效；开启预渲染时重渲首页、涉及的频道页与写入的文章。"""
+        from core.cache import bump_content_version
+        from core.pagecache import purge_tags
+        from core.snapshot import PORTAL_SCOPE, invalidate_home_snapshot, site_scope
+        from .sitemaps import invalidate as invalidate_sitemaps
+        if not (self.stats["created"] or self.stats["updated"]): return
+        slugs=list(Channel.objects.filter(id__in=self.touched_channels).values_list("slug",flat=True))
+        invalidate_home_snapshot(site)
+        bump_content_version(site_scope(site.id),PORTAL_SCOPE)
+        invalidate_sitemaps(site.id,[i for i,_ in self.written])
+        purge_tags(f"site:{site.id}",*[f"channel:{s}" for s in slugs],*[f"page:{i}" for i,_ in self.written])
+        if settings.PRERENDER_ENABLED:
+            from core.prerender import channel_paths
+            from core.tasks import enqueue_prerender
+            root=site.root_page.url_path
+            enqueue_prerender(site.id,["/",*channel_paths(site,slugs),*["/"+p[len(root):] for _,p in self.written]])
@@ -19,12 +19,16 @@ INSTALLED_APPS = [
     "wagtail.users","wagtail.snippets","wagtail.documents","wagtail.images",
     "wagtail.search","wagtail.admin","wagtail","modelcluster","taggit",
     "wagtail.contrib.settings",
+    "django_tasks","django_tasks.backends.database",
     "core","news","authapp","portal",
 ]
 MIDDLEWARE = [
+    "core.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.pagecache.PageCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "core.sites.SiteRegistryMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -59,7 +63,60 @@ if REDIS_URL:
                        "OPTIONS":{"CLIENT_CLASS":"django_redis.client.DefaultClient"}}}
 else:
     CACHES={"default":{"BACKEND":"django.core.cache.backends.locmem.LocMemCache"}}
+HOME_SNAPSHOT_TTL=int(os.getenv("HOME_SNAPSHOT_TTL","300"))
+API_HOME_TTL=int(os.getenv("API_HOME_TTL","30"))
+API_PORTAL_TTL=int(os.getenv("API_PORTAL_TTL","30"))
+API_PORTAL_MAX_LIMIT=int(os.getenv("API_PORTAL_MAX_LIMIT","100"))
+API_MAX_AGE=int(os.getenv("API_MAX_AGE","10"))
+API_CDN_MAX_AGE=int(os.getenv("API_CDN_MAX_AGE","300"))
+CACHE_TTL_JITTER=float(os.getenv("CACHE_TTL_JITTER","0.1"))
+SWR_STALE_TTL=int(os.getenv("SWR_STALE_TTL","3600"))
+SWR_LOCK_TIMEOUT=int(os.getenv("SWR_LOCK_TIMEOUT","30"))
+SWR_LOCK_WAIT=float(os.getenv("SWR_LOCK_WAIT","2"))
 DEFAULT_AUTO_FIELD="django.db.models.BigAutoField"
 OS_ENABLED=os.getenv("OS_ENABLED","0")=="1"
 OS_URL=os.getenv("OS_URL","http://127.0.0.1:9200")
 OS_INDEX=os.getenv("OS_INDEX","news_articles")
+OS_TIMEOUT=float(os.getenv("OS_TIMEOUT","1.5"))
+OS_POOL_SIZE=int(os.getenv("OS_POOL_SIZE","10"))
+OS_BREAKER_FAILURES=int(os.getenv("OS_BREAKER_FAILURES","5"))
+OS_BREAKER_RESET=float(os.getenv("OS_BREAKER_RESET","30"))
+TASKS={"default":{"BACKEND":os.getenv("TASKS_BACKEND","django_tasks.backends.database.DatabaseBackend")}}
+SEARCH_SYNC_DELAY=float(os.getenv("SEARCH_SYNC_DELAY","2"))
+SEARCH_SYNC_BATCH=int(os.getenv("SEARCH_SYNC_BATCH","500"))
+SEARCH_SYNC_RETRY=float(os.getenv("SEARCH_SYNC_RETRY","30"))
+SEARCH_SYNC_RETRY_MAX=float(os.getenv("SEARCH_SYNC_RETRY_MAX","1800"))
+PAGE_CACHE_ENABLED=os.getenv("PAGE_CACHE_ENABLED","1")=="1"
+PAGE_CACHE_ALIAS=os.getenv("PAGE_CACHE_ALIAS","default")
+PAGE_CACHE_TTL=int(os.getenv("PAGE_CACHE_TTL","300"))
+PAGE_CACHE_EXCLUDE=("/admin/","/auth/","/api/","/documents/","/static/","/media/")
+PAGE_CACHE_IGNORED_PARAMS=("fbclid","gclid")
+PRERENDER_ENABLED=os.getenv("PRERENDER_ENABLED","0")=="1"
+PRERENDER_ROOT=os.getenv("PRERENDER_ROOT",str(BASE_DIR/"prerendered"))
+PRERENDER_PROCESSES=int(os.getenv("PRERENDER_PROCESSES","4"))
+SITE_REGISTRY_CHECK=float(os.getenv("SITE_REGISTRY_CHECK","5"))
+PROFILING_ENABLED=os.getenv("PROFILING_ENABLED","0")=="1"
+PROFILING_SERVER_TIMING=os.getenv("PROFILING_SERVER_TIMING","1")=="1"
+METRICS_ALLOWED_IPS=[ip for ip in os.getenv("METRICS_ALLOWED_IPS","127.0.0.1,::1").split(",") if ip]
+METRICS_TOKEN=os.getenv("METRICS_TOKEN","")
+QUERY_BUDGETS={route:int(n) for route,_,n in (item.rpartition(":") for item in os.getenv("QUERY_BUDGETS","").split(",") if item)}
+QUERY_BUDGET_MODE=os.getenv("QUERY_BUDGET_MODE","log")
+TRACKING_ENABLED=os.getenv("TRACKING_ENABLED","1")=="1"
+TRACKING_BUFFER_SIZE=int(os.getenv("TRACKING_BUFFER_SIZE","100000"))
+TRACKING_FLUSH_INTERVAL=float(os.getenv("TRACKING_FLUSH_INTERVAL","10"))
+TRACKING_MAX_EVENTS=int(os.getenv("TRACKING_MAX_EVENTS","100"))
+HOT_ENABLED=os.getenv("HOT_ENABLED","1")=="1"
+HOT_HALF_LIFE_HOURS=float(os.getenv("HOT_HALF_LIFE_HOURS","6"))
+HOT_WEIGHTS={"view":float(os.getenv("HOT_VIEW_WEIGHT","1")),"click":float(os.getenv("HOT_CLICK_WEIGHT","3"))}
+HOT_MIN_SCORE=float(os.getenv("HOT_MIN_SCORE","0.5"))
+HOT_TOP_K=int(os.getenv("HOT_TOP_K","50"))
+HOT_FLUSH_INTERVAL=float(os.getenv("HOT_FLUSH_INTERVAL","10"))
+HOT_RANKING_TTL=int(os.getenv("HOT_RANKING_TTL","60"))
+RENDITION_QUEUE_TTL=int(os.getenv("RENDITION_QUEUE_TTL","300"))
+RENDITION_PROCESSES=int(os.getenv("RENDITION_PROCESSES","2"))
+RESPONSIVE_WIDTHS=[int(w) for w in os.getenv("RESPONSIVE_WIDTHS","320,480,640,960,1280").split(",") if w]
+RESPONSIVE_FORMATS=[f for f in os.getenv("RESPONSIVE_FORMATS","avif,webp").split(",") if f]
+SITEMAP_SHARD_SIZE=int(os.getenv("SITEMAP_SHARD_SIZE","50000"))
+SITEMAP_TTL=int(os.getenv("SITEMAP_TTL","86400"))
+FEED_SIZE=int(os.getenv("FEED_SIZE","50"))
+FEED_TTL=int(os.getenv("FEED_TTL","300"))
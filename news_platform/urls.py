@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path, include
-from django.views.generic import TemplateView
+import core.profiling
+import core.views
 import portal.views
 from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
@@ -13,6 +14,16 @@ urlpatterns = [
     path("auth/", include("authapp.urls")),
     path("api/home", portal.views.api_home, name="api-home"),
     path("api/portal", portal.views.api_portal, name="api-portal"),
-    path("fragments/more-items/", TemplateView.as_view(template_name="fragments/more_items.html"), name="more-items"),
+    path("api/hot", portal.views.api_hot, name="api-hot"),
+    path("api/track", portal.views.api_track, name="api-track"),
+    path("metrics", core.profiling.metrics_view, name="metrics"),
+    path("fragments/more-items/", core.views.more_items, name="more-items"),
+    path("sitemap.xml", core.views.sitemap_index, name="sitemap"),
+    path("sitemaps/pages.xml", core.views.sitemap_pages, name="sitemap-pages"),
+    path("sitemaps/articles-<int:shard>.xml.gz", core.views.sitemap_shard, name="sitemap-shard"),
+    path("sitemaps/channel/<slug:channel>-<int:shard>.xml.gz", core.views.sitemap_shard, name="sitemap-channel-shard"),
+    path("sitemaps/channel/<slug:channel>.xml", core.views.sitemap_index, name="sitemap-channel"),
+    path("feeds/<str:kind>.xml", core.views.feed, name="feed"),
+    path("feeds/<slug:channel>/<str:kind>.xml", core.views.feed, name="feed-channel"),
     path("", include(wagtail_urls)),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,31 @@
+import hashlib, json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from core.cache import swr_get
+try:
+    import orjson
+except ImportError:
+    orjson=None
+
+# 版本化的 JSON 响应缓存：缓存的是序列化后的字节 + 强 ETag（正文 md5）+ Last-Modified（内容版本时间戳）。
+# 条件请求命中时只读一次缓存就返回 304，不查库也不序列化；Cache-Control / Surrogate-Key 供 CDN 缓存与按键清除。
+# 安装了 orjson 时用它编码，否则退回标准库 json。
+
+def _entry(payload,last_modified):
+    body=orjson.dumps(payload,default=DjangoJSONEncoder().default) if orjson else json.dumps(payload,cls=DjangoJSONEncoder).encode()
+    return {"body":body,"etag":f'"{hashlib.md5(body).hexdigest()}"',"last_modified":int(last_modified)}
+
+def cached_json(request,key,build,ttl,version,surrogate_keys=()):
+    """version 为内容版本时间戳（见 core.cache.content_version），变化即重建。"""
+    entry=swr_get(key,lambda:_entry(build(),version),ttl,repr(version))
+    response=HttpResponse(entry["body"],content_type="application/json")
+    response["ETag"]=entry["etag"]
+    response["Last-Modified"]=http_date(entry["last_modified"])
+    response["Cache-Control"]=(f"public, max-age={settings.API_MAX_AGE}, s-maxage={settings.API_CDN_MAX_AGE}, "
+                               f"stale-while-revalidate={settings.API_CDN_MAX_AGE}")
+    response=get_conditional_response(request,etag=entry["etag"],last_modified=entry["last_modified"],response=response)
+    if surrogate_keys: response["Surrogate-Key"]=" ".join(surrogate_keys)
+    return response
@@ -0,0 +1,26 @@
+import pytest
+from django.core.cache import cache
+from django.test import Client, override_settings
+
+@pytest.fixture
+def client(news_sites):
+    site=news_sites[0]
+    return Client(HTTP_HOST=f"{site.hostname}:{site.port}")
+
+@pytest.mark.parametrize("limit",["abc","","1.5"])
+def test_portal_rejects_invalid_limit(client,limit):
+    assert client.get("/api/portal",{"limit":limit}).status_code==400
+
+@override_settings(OS_ENABLED=False,API_PORTAL_MAX_LIMIT=5)
+def test_portal_clamps_limit_and_cache_key(client):
+    cache.clear()
+    assert len(client.get("/api/portal",{"limit":"100000"}).json()["items"])==5
+    assert len(client.get("/api/portal",{"limit":"-3"}).json()["items"])==1
+    keys={k for k in cache._cache if "api:portal:" in k}
+    assert len(keys)==2
+    # 超出上限的值与上限本身落到同一个缓存条目
+    client.get("/api/portal",{"limit":"5"}); client.get("/api/portal",{"limit":"999"})
+    assert {k for k in cache._cache if "api:portal:" in k}==keys
+
+def test_hot_rejects_invalid_limit(client):
+    assert client.get("/api/hot",{"limit":"x"}).status_code==400
@@ -1,48 +1,144 @@
-from django.http import JsonResponse
+import hashlib, json
+from collections import defaultdict
+from django.http import HttpResponse, JsonResponse
 from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from wagtail.models import Site
-from news.models import ArticlePage, Channel
+from news.hot import RANKING_SCOPE as HOT_SCOPE, hot_items, ranking_scope
+from news.indexing import article_url, site_url_prefix
+from news.listing import listing
+from news.models import ArticleListing, ArticlePage, Channel
+from news.pagination import decode_cursor, encode_cursor, keyset_page
+from news.search import SearchUnavailable, get_search_client
+from news.tracking import KINDS as TRACK_KINDS, MAX_ARTICLE_ID, track_many
+from core.cache import content_version
+from core.profiling import timed
+from core.sites import registry
+from core.models import HomePage
+from core.snapshot import PORTAL_SCOPE, api_home_key, get_home_snapshot, home_from_snapshot, site_scope
+from .responses import cached_json
 
-def _serialize_article(a):
-    return {"id":a.id,"title":a.title,"date":a.date.isoformat() if a.date else None,
-            "url":a.get_full_url() if hasattr(a,"get_full_url") else a.url,
-            "site":a.get_site().hostname if hasattr(a,"get_site") else None,
-            "channels":[c.slug for c in a.channels.all()],
-            "has_image":bool(a.hero_image_id)}
+@timed("serialize")
+def serialize_articles(articles):
+    """批量序列化：站点取自注册表，URL 由站点根 URL + url_path 拼出，频道来自一次预取。"""
+    articles=list(articles)
+    if articles and "channels" not in getattr(articles[0],"_prefetched_objects_cache",{}):
+        prefetch_related_objects(articles,"channels")
+    prefixes={}; out=[]
+    for a in articles:
+        site=registry.for_page(a)
+        if site and site.id not in prefixes: prefixes[site.id]=site_url_prefix(site)
+        out.append({"id":a.id,"title":a.title,"date":a.date.isoformat() if a.date else None,
+                    "url":article_url(prefixes[site.id],a.url_path) if site else None,
+                    "site":site.hostname if site else None,
+                    "channels":[c.slug for c in a.channels.all()],
+                    "has_image":bool(a.hero_image_id)})
+    return out
+
+@timed("serialize")
+def serialize_listing(rows):
+    """列表读模型的行直接序列化（字段与 serialize_articles 相同）：频道 slug 用一次查询取回，不回表取文章。"""
+    rows=list(rows)
+    chs=defaultdict(list)
+    for i,slug in (ArticleListing.objects.filter(article_id__in=[r.article_id for r in rows],channel__isnull=False)
+                   .order_by("article_id","channel_id").values_list("article_id","channel__slug")):
+        if slug not in chs[i]: chs[i].append(slug)
+    prefixes={}; out=[]
+    for r in rows:
+        site=registry.get(r.site_id)
+        if site and site.id not in prefixes: prefixes[site.id]=site_url_prefix(site)
+        out.append({"id":r.article_id,"title":r.title,"date":r.date.isoformat(),
+                    "url":article_url(prefixes[site.id],r.url_path) if site else None,
+                    "site":site.hostname if site else None,
+                    "channels":chs[r.article_id],"has_image":r.has_image})
+    return out
 
 def api_home(request):
-    site=request.GET.get("site") or request.site.hostname
-    s=Site.objects.filter(hostname=site).first() or request.site
-    home=s.root_page.specific
-    ctx=home.get_context(request)
-    mods=[{"title":m.get("title"),"items":[_serialize_article(a) for a in m.get("items",[])]} for m in ctx.get("modules",[])]
-    return JsonResponse({"site":s.hostname,"featured":[_serialize_article(a) for a in ctx.get("featured",[])],"modules":mods})
+    hostname=request.GET.get("site")
+    s=(hostname and registry.for_hostname(hostname)) or Site.find_for_request(request)
+    if s is None: return JsonResponse({"error":"site not found"},status=404)
+    def build():
+        home=registry.home(s)
+        # 直接按目标站点取快照（get_context 会按请求的主机名解析站点）
+        featured,modules=home_from_snapshot(get_home_snapshot(home,s,registry.toggles(s))) if isinstance(home,HomePage) else ([],[])
+        mods=[{"title":m.get("title"),"items":serialize_articles(m.get("items",[]))} for m in modules]
+        return {"site":s.hostname,"featured":serialize_articles(featured),"modules":mods}
+    return cached_json(request,api_home_key(s.id),build,settings.API_HOME_TTL,content_version(site_scope(s.id)),
+                       ["home",f"site-{s.id}"])
+
+def _search_portal(limit,ch_slug,only_img,cursor):
+    q={"size":limit+1,"sort":[{"date":{"order":"desc"}},{"id":{"order":"desc"}}],"query":{"bool":{"must":[]}}}
+    if ch_slug: q["query"]["bool"]["must"].append({"term":{"channels": ch_slug}})
+    if only_img: q["query"]["bool"]["must"].append({"term":{"has_image": True}})
+    after=decode_cursor(cursor)
+    if after: q["search_after"]=[int(after[0].timestamp()*1000),after[1]]
+    hits=get_search_client().search(settings.OS_INDEX,q).get("hits",{}).get("hits",[])
+    items=[]
+    for h in hits[:limit]:
+        s=h.get("_source",{})
+        items.append({"id":s.get("id"),"title":s.get("title"),"date":s.get("date"),
+                      "url":s.get("absolute_url"),"site":s.get("site_hostname"),
+                      "channels":s.get("channels",[]),"has_image":s.get("has_image",False)})
+    last=items[-1] if len(hits)>limit else None
+    return items,encode_cursor(parse_datetime(last["date"]),last["id"]) if last else None
 
 def api_portal(request):
-    limit=int(request.GET.get("limit",20))
+    # 条数有上限：过大的 limit 让 keyset 分页退化成整表读取，每个不同的值还各占一份响应缓存
+    try: limit=max(1,min(int(request.GET.get("limit",20)),settings.API_PORTAL_MAX_LIMIT))
+    except ValueError: return JsonResponse({"error":"invalid limit"},status=400)
     ch_slug=request.GET.get("channel")
     only_img=request.GET.get("only_image") in ("1","true","True")
-    items=[]
-    if settings.OS_ENABLED:
-        import requests
-        q={"size":limit,"sort":[{"date":{"order":"desc"}}],"query":{"bool":{"must":[]}}}
-        if ch_slug: q["query"]["bool"]["must"].append({"term":{"channels.keyword": ch_slug}})
-        if only_img: q["query"]["bool"]["must"].append({"term":{"has_image": True}})
-        r=requests.post(f"{settings.OS_URL.rstrip('/')}/{settings.OS_INDEX}/_search",json=q,timeout=5)
-        if r.status_code==200:
-            hits=r.json().get("hits",{}).get("hits",[])
-            for h in hits:
-                s=h.get("_source",{})
-                items.append({"id":s.get("id"),"title":s.get("title"),"date":s.get("date"),
-                              "url":s.get("absolute_url"),"site":s.get("site_hostname"),
-                              "channels":s.get("channels",[]),"has_image":s.get("has_image",False)})
-    else:
-        qs=ArticlePage.objects.live().public().specific().order_by("-date")
-        if ch_slug:
+    cursor=request.GET.get("cursor")
+    def build():
+        if settings.OS_ENABLED:
             try:
-                ch=Channel.objects.get(slug=ch_slug); qs=qs.filter(channels=ch)
-            except Channel.DoesNotExist:
-                qs=qs.none()
-        if only_img: qs=qs.filter(hero_image__isnull=False)
-        items=[_serialize_article(a) for a in qs.select_related("hero_image")[:limit]]
-    return JsonResponse({"items":items})
+                items,next_cursor=_search_portal(limit,ch_slug,only_img,cursor)
+                return {"items":items,"next":next_cursor}
+            except SearchUnavailable:
+                # 搜索不可用（超时/熔断）时退回数据库查询
+                get_search_client().record_fallback()
+        if ch_slug:
+            ch=Channel.objects.filter(slug=ch_slug).first()
+            qs=listing(None,ch) if ch else ArticleListing.objects.none()
+        else:
+            qs=listing()
+        if only_img: qs=qs.filter(has_image=True)
+        rows,next_cursor,_=keyset_page(qs,limit,after=cursor,key="article_id")
+        return {"items":serialize_listing(rows),"next":next_cursor}
+    variant=hashlib.md5(f"{ch_slug}|{limit}|{only_img}|{cursor}".encode()).hexdigest()
+    return cached_json(request,f"api:portal:{variant}",build,settings.API_PORTAL_TTL,content_version(PORTAL_SCOPE),
+                       ["portal"]+([f"channel-{ch_slug}"] if ch_slug else []))
+
+def api_hot(request):
+    """热度排行：读取预先算好的前 K 篇，按排行顺序一次取回并序列化。"""
+    hostname=request.GET.get("site")
+    s=(hostname and registry.for_hostname(hostname)) or Site.find_for_request(request)
+    if s is None: return JsonResponse({"error":"site not found"},status=404)
+    ch_slug=request.GET.get("channel") or None
+    try: limit=max(1,min(int(request.GET.get("limit",10)),settings.HOT_TOP_K))
+    except ValueError: return JsonResponse({"error":"invalid limit"},status=400)
+    scope=ranking_scope(s.id,ch_slug)
+    def build():
+        ids=[i for i,_,_ in hot_items(scope)][:limit]
+        found={a.id:a for a in ArticlePage.objects.listed(s).filter(id__in=ids)}
+        return {"site":s.hostname,"channel":ch_slug,"items":serialize_articles(found[i] for i in ids if i in found)}
+    return cached_json(request,f"api:hot:{scope}:{limit}",build,settings.HOT_RANKING_TTL,content_version(HOT_SCOPE),
+                       ["hot",f"site-{s.id}"])
+
+@csrf_exempt
+@require_POST
+def api_track(request):
+    """打点信标：navigator.sendBeacon 发来 {"events":[{"id":文章ID,"type":"impression|view|click"}, ...]}，只写入进程内缓冲。"""
+    try:
+        events=json.loads(request.body)["events"][:settings.TRACKING_MAX_EVENTS]
+        events=[(int(e["id"]),e["type"]) for e in events if e.get("type") in TRACK_KINDS]
+    except (ValueError,KeyError,TypeError,AttributeError):
+        return JsonResponse({"error":"invalid payload"},status=400)
+    # 超出 IntegerField 范围的 ID 会让整批写入失败，直接丢弃
+    events=[(i,kind) for i,kind in events if 0<i<=MAX_ARTICLE_ID]
+    site=getattr(request,"_wagtail_site",None)
+    track_many(events,site.id if site else None)
+    return HttpResponse(status=204)
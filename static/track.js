@@ -0,0 +1,11 @@
+(function(){var q=[],seen={},t=null,url='/api/track';
+function send(){t=null;if(!q.length)return;var b=JSON.stringify({events:q.splice(0,100)});
+if(!(navigator.sendBeacon&&navigator.sendBeacon(url,b)))fetch(url,{method:'POST',body:b,keepalive:true});if(q.length)send();}
+function push(id,type){q.push({id:+id,type:type});if(!t)t=setTimeout(send,2000);}
+var io=window.IntersectionObserver&&new IntersectionObserver(function(es){es.forEach(function(e){var id=e.target.dataset.trackId;
+if(e.isIntersecting&&!seen[id]){seen[id]=1;push(id,'impression');io.unobserve(e.target);}})},{threshold:0.5});
+function scan(root){if(io)root.querySelectorAll('.card[data-track-id]').forEach(function(el){io.observe(el)});}
+scan(document);document.addEventListener('htmx:afterSwap',function(e){scan(e.target.parentNode||document)});
+document.addEventListener('click',function(e){var c=e.target.closest&&e.target.closest('.card[data-track-id]');if(c)push(c.dataset.trackId,'click');});
+var v=document.querySelector('[data-track-view]');if(v)push(v.dataset.trackId,'view');
+document.addEventListener('visibilitychange',function(){if(document.visibilityState==='hidden')send();});})();